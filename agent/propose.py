@@ -2,7 +2,7 @@
 import json
 from typing import List, Dict, Any
 from config import MODEL_NAME
-from api_client import setup_client
+from api_client import get_client
 
 SYSTEM = (
     "你将阅读一段英文文章，挑选 5~20 个『值得学习』的英文词或短语。"
@@ -33,7 +33,7 @@ TOOLS = [{
 }]
 
 def propose_from_text(text: str, k_min:int=5, k_max:int=20) -> List[Dict[str, Any]]:
-    client = setup_client()
+    client = get_client()
     user = {"role":"user","content": f"文章：\n{text}\n请挑选 {k_min}~{k_max} 个候选并调用 propose_words_from_text。"}
     resp = client.chat.completions.create(
         model=MODEL_NAME, temperature=0.0,
@@ -1,13 +1,100 @@
 # -*- coding: utf-8 -*-
+"""
+进程级共享的 LLM 客户端（OpenAI SDK + httpx 连接池）。
+
+- 首次使用时才创建（get_client），之后所有调用方（enrich / grader / propose / IPA / GUI）
+  共用同一个客户端，复用 keep-alive 连接，不再每个词一次 TCP+TLS 握手；
+- 客户端只创建一次、从不替换（先拿到它的 GUI 等调用方与后来者共用同一个连接池）：
+  连接上限取 config.LLM_POOL_SIZE 与首次创建时 ensure_pool_size 请求值中的较大者，
+  连接按需建立，上限设大不占资源；之后请求更大的并发只会排队等空闲连接；
+- HTTP/2 需显式开启（config.LLM_HTTP2 或环境变量 LLM_HTTP2=1，且需安装 h2）；
+- 代理环境变量只在创建客户端时清理一次。
+
+setup_client() 保留为旧接口，返回同一个共享客户端。
+异步引擎（enrich/async_engine.py）用 make_async_client() 单独创建 AsyncOpenAI：
+它绑定在创建时的事件循环上，不能跨 asyncio.run 共享，由调用方负责关闭。
+"""
 import os
+import threading
+
 import httpx
-from openai import OpenAI
-from config import API_KEY, BASE_URL, DEFAULT_TIMEOUT
+from openai import AsyncOpenAI, OpenAI
+from config import (API_KEY, BASE_URL, DEFAULT_TIMEOUT, LLM_HTTP2, LLM_KEEPALIVE_S,
+                    LLM_POOL_SIZE)
+
+_LOCK = threading.Lock()
+_CLIENT = None
+_POOL_SIZE = 0
+
 
-def setup_client():
+def _prepare_env():
     # 清理代理，避免连不上
     for var in ("ALL_PROXY", "all_proxy"):
         os.environ.pop(var, None)
     os.environ["NO_PROXY"] = os.environ["no_proxy"] = "api.nuwaapi.com"
-    http_client = httpx.Client(http2=False, proxy=None, timeout=DEFAULT_TIMEOUT)
+
+
+def _http2_enabled() -> bool:
+    if not (LLM_HTTP2 or os.getenv("LLM_HTTP2") == "1"):
+        return False
+    try:
+        import h2  # noqa: F401  (httpx 的 HTTP/2 依赖)
+    except Exception:
+        print("[api_client] LLM_HTTP2 需要 `pip install httpx[http2]`，回退到 HTTP/1.1")
+        return False
+    return True
+
+
+def _build(pool_size: int) -> OpenAI:
+    limits = httpx.Limits(max_connections=pool_size,
+                          max_keepalive_connections=pool_size,
+                          keepalive_expiry=LLM_KEEPALIVE_S)
+    http_client = httpx.Client(http2=_http2_enabled(), proxy=None,
+                               timeout=DEFAULT_TIMEOUT, limits=limits)
     return OpenAI(api_key=API_KEY, base_url=BASE_URL, http_client=http_client)
+
+
+def get_client(pool_size: int | None = None) -> OpenAI:
+    """共享客户端（线程安全，懒创建）；pool_size 只在首次创建时参与决定连接上限"""
+    global _CLIENT, _POOL_SIZE
+    with _LOCK:
+        if _CLIENT is None:
+            _prepare_env()
+            _POOL_SIZE = max(1, LLM_POOL_SIZE, pool_size or 0)
+            _CLIENT = _build(_POOL_SIZE)
+        elif pool_size and pool_size > _POOL_SIZE:
+            print(f"[api_client] 并发 {pool_size} 超过连接上限 {_POOL_SIZE}，"
+                  f"多出的请求排队等待空闲连接（可调大 config.LLM_POOL_SIZE）")
+        return _CLIENT
+
+
+def make_async_client(pool_size: int) -> AsyncOpenAI:
+    """新的异步客户端（连接上限 pool_size）；SDK 内部重试关闭，由调用方按 429/Retry-After 自行调度"""
+    with _LOCK:
+        if _CLIENT is None:
+            _prepare_env()
+    limits = httpx.Limits(max_connections=pool_size,
+                          max_keepalive_connections=pool_size,
+                          keepalive_expiry=LLM_KEEPALIVE_S)
+    http_client = httpx.AsyncClient(http2=_http2_enabled(), proxy=None,
+                                    timeout=DEFAULT_TIMEOUT, limits=limits)
+    return AsyncOpenAI(api_key=API_KEY, base_url=BASE_URL, http_client=http_client,
+                       max_retries=0)
+
+
+def ensure_pool_size(n: int) -> OpenAI:
+    """并发调用方（如 enrich 的 batch_size）在开始前声明所需连接数"""
+    return get_client(n)
+
+
+def close_client():
+    global _CLIENT, _POOL_SIZE
+    with _LOCK:
+        client, _CLIENT, _POOL_SIZE = _CLIENT, None, 0
+    if client is not None:
+        client.close()
+
+
+def setup_client() -> OpenAI:
+    """旧接口：返回共享客户端"""
+    return get_client()
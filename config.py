@@ -16,3 +16,29 @@ MODEL_NAME = "gpt-5-chat"
 DEFAULT_BATCH_SIZE = 4
 DEFAULT_CHECKPOINT_EVERY = 20
 DEFAULT_TIMEOUT = 120
+# 每个 enrich 请求包含的词数（1 = 逐词请求；批量建议 8~20）
+DEFAULT_WORDS_PER_REQUEST = 1
+
+# 共享 LLM 客户端的连接池（api_client.get_client）
+# 连接上限（客户端只建一次，不再扩容）：覆盖常见的 enrich 并发，并留出 GUI / 批改等零散调用的余量；
+# 连接按需建立，上限设大不额外占资源
+LLM_POOL_SIZE = max(32, DEFAULT_BATCH_SIZE * 2)
+# 空闲 keep-alive 连接保留秒数
+LLM_KEEPALIVE_S = 60.0
+# HTTP/2 默认关闭（需 pip install httpx[http2]；也可用环境变量 LLM_HTTP2=1 开启）
+LLM_HTTP2 = False
+
+# 自适应并发 enrich（enrich/async_engine.py，CLI --adaptive）：在途请求数上限；
+# 起始值为 batch_size，健康时逐步加到上限，429/超时减半
+ENRICH_MAX_CONCURRENCY = 32
+
+# LLM 扩充结果缓存（enrich/cache.py）：SQLite 文件与大小上限（超出按 LRU 淘汰）
+ENRICH_CACHE_PATH = os.getenv("ENRICH_CACHE_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "cache", "enrich.sqlite")
+ENRICH_CACHE_MAX_MB = 256
+
+# WebView 端 progress.json 的合并写入窗口（毫秒）
+PERSIST_WINDOW_MS = 250
+
+# WebView 端学习队列（每日计划/到期/按分数）后台预计算前的空闲时间（毫秒）
+PRECOMPUTE_IDLE_MS = 500
@@ -32,9 +32,9 @@ except Exception:  # noqa
 
 def _llm_ipa(word: str) -> str | None:
     try:
-        from api_client import setup_client
+        from api_client import get_client
         from config import MODEL_NAME
-        client = setup_client()
+        client = get_client()
         sys = {"role": "system",
                "content": "Return ONLY the IPA (no slashes), American English if possible. No extra text."}
         usr = {"role": "user", "content": f"Give IPA for: {word}"}
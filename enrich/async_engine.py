@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+"""
+异步 enrich 引擎：AsyncOpenAI + AIMD 自适应并发。
+
+enrich_file 用固定大小的线程池，遇到 429 只会各自盲目退避；这里改为：
+- 在途请求数上限 limit 从 batch_size 起步，请求成功且延迟不超过基线的 LATENCY_TOLERANCE 倍、
+  错误率低时每个成功请求加 1/limit（约每轮 +1，加性增）；
+- 429 / 超时 / 5xx / 连接错误时减半（乘性减），同一个延迟窗口内只减一次；
+- 响应带 Retry-After（或 retry-after-ms）时全局暂停发新请求，而不是每个 worker 各睡各的；
+- 延迟基线按每请求词数分别记录（整批请求与拆分后的单词重试耗时差别很大），
+  比较的是“本次延迟 / 同尺寸基线”的平滑值；计时只包含网络请求本身；
+- 缓存写入与检查点日志追加交给单独的写线程，不阻塞事件循环，也不计入请求延迟；
+- progress_cb(done, total) 照常调用；若回调接受第三个参数，再传入
+  {"inflight", "limit", "words_per_s"} 供界面显示。
+
+请求构造、解析、缓存与失败兜底都复用 enrich.enrich，输出格式与 enrich_file 相同；
+检查点同样是追加式旁路日志（enrich/journal.py），两种引擎可以互相续跑。
+"""
+import asyncio
+import inspect
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import openai
+from tqdm import tqdm
+
+from api_client import make_async_client
+from config import ENRICH_MAX_CONCURRENCY, MODEL_NAME
+from enrich.cache import cache_key, default_cache, normalize_word
+from enrich.enrich import (ENRICH_PROMPT_VERSION, _fill_defaults, batch_messages,
+                           failed_entry, need_fix, one_messages,
+                           parse_batch, parse_one, skipped_entry)
+from enrich.journal import EnrichJournal, load_resume
+from utils.jsonio import dump_json_atomic, load_vocab_array
+
+OK, OVERLOAD, ERROR = "ok", "overload", "error"
+
+# 平滑延迟超过基线的这么多倍就不再加并发
+LATENCY_TOLERANCE = 2.0
+# 错误率（EWMA）超过该值不再加并发
+ERROR_TOLERANCE = 0.05
+_EWMA = 0.2
+# 单个任务最多尝试次数（与 enrich_file 相同）
+MAX_ATTEMPTS = 5
+# Retry-After 最长只认这么久
+MAX_PAUSE_S = 60.0
+# 吞吐统计窗口（秒）
+_RATE_WINDOW = 10.0
+
+
+class AIMDController:
+    """在途请求数的 AIMD 控制（单事件循环内使用）"""
+
+    def __init__(self, initial: int, min_limit: int = 1, max_limit: int = ENRICH_MAX_CONCURRENCY):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.inflight = 0
+        self.peak_inflight = 0
+        self.cuts = 0
+        self._cond = asyncio.Condition()
+        self._pause_until = 0.0
+        self._base: Dict[int, float] = {}     # 每请求词数 -> 基线延迟（近似不排队时的延迟）
+        self._ratio = 1.0                     # 平滑的 延迟 / 同尺寸基线
+        self._rtt: Optional[float] = None     # 平滑的原始延迟（减半冷却窗口）
+        self._err = 0.0                       # 平滑错误率
+        self._last_cut = float("-inf")
+
+    @property
+    def cap(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        async with self._cond:
+            while True:
+                wait = self._pause_until - loop.time()
+                if wait > 0:
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self.inflight < self.cap:
+                    self.inflight += 1
+                    self.peak_inflight = max(self.peak_inflight, self.inflight)
+                    return
+                await self._cond.wait()
+
+    async def release(self, outcome: str, latency: float, size: int = 1,
+                      retry_after: Optional[float] = None):
+        """size: 该请求包含的词数（按尺寸分别维护延迟基线）"""
+        loop = asyncio.get_running_loop()
+        async with self._cond:
+            self.inflight -= 1
+            now = loop.time()
+            if outcome == OK:
+                self._err *= 1 - _EWMA
+                base = self._base.get(size)
+                if base is None or latency < base:
+                    base = self._base[size] = latency
+                else:
+                    # 基线缓慢上漂，避免被一次异常快的响应永久压低
+                    base = self._base[size] = base + 0.01 * (latency - base)
+                self._ratio = (1 - _EWMA) * self._ratio + _EWMA * (latency / max(base, 1e-6))
+                self._rtt = latency if self._rtt is None else (1 - _EWMA) * self._rtt + _EWMA * latency
+                if self._ratio <= LATENCY_TOLERANCE and self._err < ERROR_TOLERANCE:
+                    self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            else:
+                self._err = (1 - _EWMA) * self._err + _EWMA
+                # 一个延迟窗口内的多个 429 属于同一次过载，只减一次
+                if outcome == OVERLOAD and now - self._last_cut >= max(1.0, self._rtt or 0.0):
+                    self.limit = max(float(self.min_limit), self.limit / 2)
+                    self._last_cut = now
+                    self.cuts += 1
+            if retry_after:
+                self._pause_until = max(self._pause_until, now + min(retry_after, MAX_PAUSE_S))
+            self._cond.notify_all()
+
+
+def retry_after(ex: BaseException) -> Optional[float]:
+    """从 429/503 响应头取等待秒数（retry-after-ms / retry-after 秒数或 HTTP 日期）"""
+    headers = getattr(getattr(ex, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        ms = headers.get("retry-after-ms")
+        if ms:
+            return max(0.0, float(ms) / 1000)
+    except Exception:
+        pass
+    v = headers.get("retry-after")
+    if not v:
+        return None
+    try:
+        return max(0.0, float(v))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(v).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def classify(ex: BaseException) -> str:
+    """OVERLOAD：应当减并发的错误；ERROR：与负载无关（请求本身有问题等）"""
+    if isinstance(ex, (openai.RateLimitError, openai.APITimeoutError, asyncio.TimeoutError)):
+        return OVERLOAD
+    if isinstance(ex, openai.APIStatusError):
+        return OVERLOAD if ex.status_code >= 500 or ex.status_code == 408 else ERROR
+    if isinstance(ex, openai.APIConnectionError):
+        return OVERLOAD
+    return ERROR
+
+
+def _reporter(progress_cb: Optional[Callable]) -> Optional[Callable]:
+    """兼容 progress_cb(done, total) 与 progress_cb(done, total, info)"""
+    if progress_cb is None:
+        return None
+    try:
+        params = inspect.signature(progress_cb).parameters.values()
+        wants_info = any(p.kind == p.VAR_POSITIONAL for p in params) or sum(
+            p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD) for p in params) >= 3
+    except (TypeError, ValueError):
+        wants_info = False
+    if wants_info:
+        return progress_cb
+    return lambda done, total, info: progress_cb(done, total)
+
+
+async def enrich_file_async(
+    input_json: Path,
+    output_json: Path,
+    batch_size: int = 4,
+    checkpoint_every: int = 20,
+    only_fix_missing: bool = False,
+    progress_cb: Optional[Callable[..., None]] = None,
+    show_tqdm: bool = False,
+    use_cache: bool = True,
+    words_per_request: int = 1,
+    max_concurrency: int = ENRICH_MAX_CONCURRENCY
+) -> Path:
+    """
+    参数同 enrich_file；batch_size 是起始并发，max_concurrency 是自适应上限。
+    """
+    items = load_vocab_array(input_json)
+    total = len(items)
+    wpr = max(1, words_per_request)
+
+    results = load_resume(output_json, input_json, total)
+    done = len(results)
+    if results:
+        print(f"[resume] Found {done}/{total} done; resume from there.")
+    journal = EnrichJournal(output_json, input_json, total, sync_every=checkpoint_every).open()
+
+    ctl = AIMDController(batch_size, max_limit=max(batch_size, max_concurrency))
+    report = _reporter(progress_cb)
+    finished: Deque[float] = deque()
+    pbar = tqdm(total=total, initial=done, disable=not show_tqdm)
+    cache = default_cache() if use_cache else None
+    cache_hits0 = cache.hits if cache else 0
+    keys: Dict[int, Optional[str]] = {}
+
+    def info() -> Dict[str, Any]:
+        now = time.monotonic()
+        while finished and now - finished[0] > _RATE_WINDOW:
+            finished.popleft()
+        span = (now - finished[0]) if len(finished) > 1 else 0.0
+        return {"inflight": ctl.inflight, "limit": ctl.cap,
+                "words_per_s": round(len(finished) / span, 2) if span > 0 else 0.0}
+
+    # 缓存写入与日志追加：单个写线程按提交顺序执行，不阻塞事件循环
+    writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="enrich-writer")
+    write_errors: List[BaseException] = []
+
+    def _written(fut):
+        if fut.exception() is not None:
+            write_errors.append(fut.exception())
+
+    def write(fn, *args):
+        writer.submit(fn, *args).add_done_callback(_written)
+
+    def finish(i: int, obj: Dict[str, Any]):
+        nonlocal done
+        results[i] = obj
+        write(journal.append, i, obj)
+        done += 1
+        finished.append(time.monotonic())
+        if report:
+            report(done, total, info())
+        pbar.update(1)
+
+    if report and done:
+        report(done, total, info())
+
+    def pair(i: int) -> Tuple[str, str]:
+        return items[i]["word"], items[i]["meaning"]
+
+    def lookup_cache(todo: List[int]) -> Dict[int, Dict[str, Any]]:
+        hits = {}
+        for i in todo:
+            keys[i] = cache_key(*pair(i), MODEL_NAME, ENRICH_PROMPT_VERSION)
+            cached = cache.get(keys[i])
+            if cached is not None:
+                hits[i] = cached
+        return hits
+
+    # 先处理不需要请求的词（跳过 / 缓存命中），其余按 words_per_request 分成任务
+    queue: "asyncio.Queue[Tuple[List[int], int]]" = asyncio.Queue()
+    todo: List[int] = []
+    for i in range(total):
+        if i in results:
+            continue
+        if only_fix_missing and not need_fix(items[i]["meaning"]):
+            finish(i, skipped_entry(*pair(i)))
+        else:
+            todo.append(i)
+    hits = await asyncio.to_thread(lookup_cache, todo) if cache else {}
+    pending = []
+    for i in todo:
+        if i in hits:
+            finish(i, hits[i])
+        else:
+            pending.append(i)
+    for j in range(0, len(pending), wpr):
+        queue.put_nowait((pending[j:j + wpr], 0))
+
+    def handle(idx: List[int], txt: Optional[str]):
+        """解析一次成功的响应；批量中没拿到合格结果的词重新排队"""
+        if len(idx) == 1:
+            i = idx[0]
+            obj, parsed = parse_one(txt, *pair(i))
+            if keys.get(i) and parsed:
+                write(cache.put, keys[i], obj)
+            finish(i, obj)
+            return
+        pairs = [pair(i) for i in idx]
+        got = parse_batch(txt, pairs)
+        failed = []
+        for i in idx:
+            obj = got.get(normalize_word(items[i]["word"]))
+            if obj is None:
+                failed.append(i)
+                continue
+            obj = _fill_defaults(dict(obj), *pair(i))
+            if keys.get(i):
+                write(cache.put, keys[i], obj)
+            finish(i, obj)
+        # 与 enrich_many 相同：整批落空就对半拆，否则只重试失败的词
+        if len(failed) == len(idx):
+            half = (len(failed) + 1) // 2
+            queue.put_nowait((failed[:half], 0))
+            queue.put_nowait((failed[half:], 0))
+        elif failed:
+            queue.put_nowait((failed, 0))
+
+    async def worker(client: openai.AsyncOpenAI):
+        while True:
+            idx, attempt = await queue.get()
+            try:
+                messages = (one_messages(*pair(idx[0])) if len(idx) == 1
+                            else batch_messages([pair(i) for i in idx]))
+                await ctl.acquire()
+                t0 = time.monotonic()
+                try:
+                    resp = await client.chat.completions.create(
+                        model=MODEL_NAME, temperature=0.2, messages=messages)
+                    txt = resp.choices[0].message.content
+                except Exception as ex:
+                    await ctl.release(classify(ex), time.monotonic() - t0, len(idx), retry_after(ex))
+                    if attempt + 1 >= MAX_ATTEMPTS:
+                        for i in idx:
+                            finish(i, failed_entry(*pair(i), ex))
+                    else:
+                        # 全局节流由控制器负责，这里只加一点抖动，避免同一时刻集体重试
+                        await asyncio.sleep(min(8.0, 0.3 * (2 ** attempt)) + random.uniform(0, 0.25))
+                        queue.put_nowait((idx, attempt + 1))
+                else:
+                    await ctl.release(OK, time.monotonic() - t0, len(idx))
+                    try:
+                        handle(idx, txt)
+                    except Exception as ex:
+                        # 解析本身出错（不应发生）：按失败兜底，不能让 worker 退出
+                        for i in idx:
+                            if i not in results:
+                                finish(i, failed_entry(*pair(i), ex))
+            finally:
+                queue.task_done()
+
+    try:
+        if not queue.empty():
+            client = make_async_client(ctl.max_limit)
+            workers = [asyncio.create_task(worker(client)) for _ in range(ctl.max_limit)]
+            try:
+                await queue.join()
+            finally:
+                for w in workers:
+                    w.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                await client.close()
+    finally:
+        await asyncio.to_thread(writer.shutdown, True)
+        journal.close()
+    if write_errors:
+        print(f"[enrich] {len(write_errors)} cache/checkpoint writes failed: {write_errors[0]}")
+
+    pbar.close()
+
+    entries = [results[j] for j in range(total) if j in results]
+    payload = {"meta": {"source": str(input_json.resolve()), "model": MODEL_NAME,
+                        "count": len(entries), "status": "complete", "batch_size": batch_size,
+                        "words_per_request": wpr,
+                        "concurrency": {"max": ctl.max_limit, "final": ctl.cap,
+                                        "peak_inflight": ctl.peak_inflight, "cuts": ctl.cuts}},
+               "entries": entries}
+    if cache:
+        payload["meta"]["cache_hits"] = cache.hits - cache_hits0
+    dump_json_atomic(output_json, payload)
+    journal.remove()
+    return output_json
+
+
+def enrich_file_adaptive(input_json: Path, output_json: Path, **kwargs) -> Path:
+    """同步入口（CLI / GUI 线程里调用）：在新的事件循环中运行 enrich_file_async"""
+    return asyncio.run(enrich_file_async(input_json, output_json, **kwargs))
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 扩充结果的持久化缓存（SQLite，内容寻址）。
+
+键 = sha256(规范化单词, 释义提示, 模型, 系统提示版本)，所以同一个词在另一个文件、
+另一次运行、另一个词库里再次扩充时直接命中，不再调用 LLM；改了提示词或模型自然失效。
+
+- 只缓存成功解析的结果（解析失败/调用失败的兜底对象不入库）；
+- 按总字节数做 LRU 淘汰：超过上限时删除最久未用的条目，降到上限的 90%；
+- 线程安全（enrich_file 的线程池共用一个实例）。
+
+默认位置与上限见 config.ENRICH_CACHE_PATH / ENRICH_CACHE_MAX_MB；
+CLI 的 --no-cache（enrich_file(use_cache=False)）跳过缓存。
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key    TEXT PRIMARY KEY,
+    value  TEXT NOT NULL,
+    size   INTEGER NOT NULL,
+    atime  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cache_atime ON cache(atime);
+"""
+
+# 命中时最多每隔这么久才回写一次 atime（LRU 精度足够，避免每次命中都写盘）
+_TOUCH_EVERY = 600.0
+
+
+def normalize_word(word: str) -> str:
+    return " ".join((word or "").split()).casefold()
+
+
+def cache_key(word: str, hint: str, model: str, prompt_version: str) -> str:
+    raw = json.dumps([normalize_word(word), " ".join((hint or "").split()),
+                      model or "", prompt_version or ""], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def prompt_version(system_prompt: str) -> str:
+    """系统提示的短哈希：提示词一改，旧缓存自动失效"""
+    return hashlib.sha1(system_prompt.encode("utf-8")).hexdigest()[:12]
+
+
+class EnrichCache:
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT value, atime FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            now = time.time()
+            if now - row[1] > _TOUCH_EVERY:
+                with db:
+                    db.execute("UPDATE cache SET atime = ? WHERE key = ?", (now, key))
+        try:
+            return json.loads(row[0])
+        except Exception:
+            return None
+
+    def put(self, key: str, obj: Dict[str, Any]):
+        value = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            db = self._db()
+            with db:
+                old = db.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+                db.execute("INSERT OR REPLACE INTO cache (key, value, size, atime) VALUES (?,?,?,?)",
+                           (key, value, size, time.time()))
+                self._total += size - (old[0] if old else 0)
+                if self._total > self.max_bytes:
+                    self._evict(db, int(self.max_bytes * 0.9))
+
+    def _evict(self, db: sqlite3.Connection, target: int):
+        """按 atime 从旧到新删除，直到总大小 <= target"""
+        doomed, freed = [], 0
+        for key, size in db.execute("SELECT key, size FROM cache ORDER BY atime"):
+            if self._total - freed <= target:
+                break
+            doomed.append((key,))
+            freed += size
+        db.executemany("DELETE FROM cache WHERE key = ?", doomed)
+        self._total -= freed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            db = self._db()
+            n = db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            return {"entries": n, "bytes": self._total, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_DEFAULT: Optional[EnrichCache] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_cache() -> EnrichCache:
+    """进程内共享的默认缓存（懒创建）"""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            from config import ENRICH_CACHE_PATH, ENRICH_CACHE_MAX_MB
+            _DEFAULT = EnrichCache(Path(ENRICH_CACHE_PATH), int(ENRICH_CACHE_MAX_MB * 1024 * 1024))
+        return _DEFAULT
@@ -10,13 +10,14 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
 from config import MODEL_NAME
-from api_client import setup_client
-from utils.jsonio import dump_json_atomic, load_vocab_array, try_load_resume
+from api_client import ensure_pool_size, get_client
+from enrich.cache import cache_key, default_cache, normalize_word, prompt_version
+from enrich.journal import EnrichJournal, load_resume
+from utils.jsonio import dump_json_atomic, load_vocab_array
 from utils.textops import has_chinese
 
-SYSTEM_ENRICH = (
-    "你是一名双语英语词汇教练，负责『修复并丰富』给定单词的数据。"
-    "输出必须是严格的 JSON 对象（不要额外文字），字段："
+_ENRICH_ROLE = "你是一名双语英语词汇教练，负责『修复并丰富』给定单词的数据。"
+_ENRICH_FIELDS = (
     "{"
     "\"word\":\"英文原词\","
     "\"meaning_zh\":\"用简体中文给出完整释义（必要时补全与改进；精炼且覆盖常见义项）\","
@@ -28,6 +29,18 @@ SYSTEM_ENRICH = (
     "\"model_notes\":\"写给LLM的备注（多义/用法/考试高频等）\""
     "}"
 )
+SYSTEM_ENRICH = _ENRICH_ROLE + "输出必须是严格的 JSON 对象（不要额外文字），字段：" + _ENRICH_FIELDS
+
+# 批量模式：一次请求多个词，系统提示只发一次
+SYSTEM_ENRICH_BATCH = (
+    _ENRICH_ROLE
+    + "用户会给出一个 JSON 数组，每项为 {\"word\":单词,\"meaning_hint\":原始释义（可能不完整或为空）}。"
+    "输出必须是严格的 JSON 数组（不要额外文字），每个输入单词对应一个元素，"
+    "元素的 word 必须与输入的单词完全一致，元素字段：" + _ENRICH_FIELDS
+)
+
+# 批量结果元素的字段类型（校验用）
+_FIELD_TYPES = {"synonyms_en": list, "phrases": list, "example": dict, "confusions": list}
 
 
 def need_fix(m: str) -> bool:
@@ -40,29 +53,183 @@ def need_fix(m: str) -> bool:
     return False
 
 
-def enrich_one(word: str, meaning_hint: str = "") -> Dict[str, Any]:
-    client = setup_client()
+# 系统提示版本：参与缓存键，提示词一改旧缓存即失效。
+# 单词与批量两条路径的结果共用缓存，所以两份提示都计入版本
+ENRICH_PROMPT_VERSION = prompt_version(SYSTEM_ENRICH + "\n" + SYSTEM_ENRICH_BATCH)
+
+
+def enrich_one(word: str, meaning_hint: str = "", use_cache: bool = True) -> Dict[str, Any]:
+    """
+    扩充单个词；先查持久化缓存（enrich/cache.py），未命中才调用 LLM。
+    use_cache=False 时既不读也不写缓存。
+    """
+    key = cache_key(word, meaning_hint, MODEL_NAME, ENRICH_PROMPT_VERSION) if use_cache else None
+    if key:
+        cached = default_cache().get(key)
+        if cached is not None:
+            return cached
+    obj, parsed = _enrich_llm(word, meaning_hint)
+    if key and parsed:
+        default_cache().put(key, obj)
+    return obj
+
+
+# 请求构造与结果解析与传输无关，同步（本文件）与异步（enrich/async_engine.py）共用
+
+def one_messages(word: str, meaning_hint: str) -> List[Dict[str, str]]:
     user = {"role": "user",
             "content": f"单词：{word}\n原始释义（可能不完整或为空）：{meaning_hint or '（空）'}\n请按指定 JSON 模板返回。"}
-    resp = client.chat.completions.create(model=MODEL_NAME, temperature=0.2,
-                                          messages=[{"role": "system", "content": SYSTEM_ENRICH}, user])
-    txt = (resp.choices[0].message.content or "{}")
+    return [{"role": "system", "content": SYSTEM_ENRICH}, user]
+
+
+def parse_one(txt: Optional[str], word: str, meaning_hint: str) -> Tuple[Dict[str, Any], bool]:
+    """(结果, 是否成功解析)；解析失败时返回兜底对象"""
+    txt = txt or "{}"
     s, e = txt.find("{"), txt.rfind("}")
     if s != -1 and e != -1 and e > s:
         txt = txt[s:e+1]
+    parsed = True
     try:
         obj = json.loads(txt)
+        if not isinstance(obj, dict):
+            raise ValueError("not an object")
     except Exception:
+        parsed = False
         obj = {"word": word, "meaning_zh": meaning_hint or "", "pos": "", "synonyms_en": [],
                "phrases": [], "example": {"en": "", "zh": ""}, "confusions": [], "model_notes": "LLM解析失败，保留原始释义。"}
+    return _fill_defaults(obj, word, meaning_hint), parsed
+
+
+def _enrich_llm(word: str, meaning_hint: str) -> Tuple[Dict[str, Any], bool]:
+    resp = get_client().chat.completions.create(model=MODEL_NAME, temperature=0.2,
+                                                messages=one_messages(word, meaning_hint))
+    return parse_one(resp.choices[0].message.content, word, meaning_hint)
+
+
+def _fill_defaults(obj: Dict[str, Any], word: str, meaning_hint: str) -> Dict[str, Any]:
     for k, v in [("word", word), ("meaning_zh", meaning_hint or ""), ("pos", ""),
-                 ("synonyms_en", []), ("phrases", []
-                                       ), ("example", {"en": "", "zh": ""}),
+                 ("synonyms_en", []), ("phrases", []), ("example", {"en": "", "zh": ""}),
                  ("confusions", []), ("model_notes", "")]:
         obj.setdefault(k, v)
     return obj
 
 
+def _valid_item(obj: Any) -> bool:
+    if not isinstance(obj, dict) or not isinstance(obj.get("word"), str):
+        return False
+    m = obj.get("meaning_zh")
+    if not isinstance(m, str) or not m.strip():
+        return False
+    return all(k not in obj or isinstance(obj[k], t) for k, t in _FIELD_TYPES.items())
+
+
+def _parse_batch(txt: str) -> List[Any]:
+    """模型输出 -> 元素列表；兼容 [...]、{"items": [...]}、{"word": {...}} 三种形态"""
+    txt = txt or ""
+    s, e = txt.find("["), txt.rfind("]")
+    so = txt.find("{")
+    try:
+        if s != -1 and e > s and (so == -1 or s < so):
+            obj = json.loads(txt[s:e+1])
+        else:
+            obj = json.loads(txt[so:txt.rfind("}")+1]) if so != -1 else []
+    except Exception:
+        return []
+    if isinstance(obj, dict):
+        if isinstance(obj.get("items"), list):
+            return obj["items"]
+        return [dict(v, word=v.get("word") or k) for k, v in obj.items() if isinstance(v, dict)]
+    return obj if isinstance(obj, list) else []
+
+
+def batch_messages(pairs: List[Tuple[str, str]]) -> List[Dict[str, str]]:
+    payload = [{"word": w, "meaning_hint": h or ""} for w, h in pairs]
+    user = {"role": "user",
+            "content": json.dumps(payload, ensure_ascii=False) + "\n请按指定 JSON 模板返回数组。"}
+    return [{"role": "system", "content": SYSTEM_ENRICH_BATCH}, user]
+
+
+def parse_batch(txt: Optional[str], pairs: List[Tuple[str, str]]) -> Dict[str, Dict[str, Any]]:
+    """规范化单词 -> 通过校验的结果（缺失/不合格的词不在其中）"""
+    wanted = {normalize_word(w) for w, _ in pairs}
+    out: Dict[str, Dict[str, Any]] = {}
+    for obj in _parse_batch(txt):
+        if _valid_item(obj):
+            k = normalize_word(obj["word"])
+            if k in wanted and k not in out:
+                out[k] = obj
+    return out
+
+
+def _enrich_llm_batch(pairs: List[Tuple[str, str]]) -> Dict[str, Dict[str, Any]]:
+    """一次请求扩充多个词"""
+    resp = get_client().chat.completions.create(model=MODEL_NAME, temperature=0.2,
+                                                messages=batch_messages(pairs))
+    return parse_batch(resp.choices[0].message.content, pairs)
+
+
+def enrich_many(pairs: List[Tuple[str, str]], use_cache: bool = True) -> List[Dict[str, Any]]:
+    """
+    批量扩充 [(word, meaning_hint), ...]，结果与输入一一对应。
+    先查缓存；其余的词整批请求，只把没拿到合格结果的词对半拆开重试，
+    拆到单个词时退回 enrich_one 的单词请求（含解析失败兜底）。
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(pairs)
+    keys = [cache_key(w, h, MODEL_NAME, ENRICH_PROMPT_VERSION) if use_cache else None
+            for w, h in pairs]
+    todo = []
+    for i, key in enumerate(keys):
+        cached = default_cache().get(key) if key else None
+        if cached is not None:
+            results[i] = cached
+        else:
+            todo.append(i)
+
+    def run(idx: List[int]):
+        if not idx:
+            return
+        if len(idx) == 1:
+            i = idx[0]
+            obj, parsed = _enrich_llm(*pairs[i])
+            results[i] = obj
+            if keys[i] and parsed:
+                default_cache().put(keys[i], obj)
+            return
+        got = _enrich_llm_batch([pairs[i] for i in idx])
+        failed = []
+        for i in idx:
+            obj = got.get(normalize_word(pairs[i][0]))
+            if obj is None:
+                failed.append(i)
+                continue
+            obj = _fill_defaults(dict(obj), *pairs[i])
+            results[i] = obj
+            if keys[i]:
+                default_cache().put(keys[i], obj)
+        if len(failed) == len(idx):
+            # 整批都没拿到：对半拆开
+            half = (len(failed) + 1) // 2
+            run(failed[:half])
+            run(failed[half:])
+        else:
+            # 只重试失败的词（批更小）
+            run(failed)
+
+    run(todo)
+    return results
+
+
+def skipped_entry(word: str, meaning: str) -> Dict[str, Any]:
+    return {"word": word, "meaning_zh": meaning, "pos": "", "synonyms_en": [],
+            "phrases": [], "example": {"en": "", "zh": ""}, "confusions": [], "model_notes": "原释义较完整，未调用LLM。"}
+
+
+def failed_entry(word: str, meaning: str, ex: Exception) -> Dict[str, Any]:
+    return {"word": word, "meaning_zh": meaning, "pos": "", "synonyms_en": [],
+            "phrases": [], "example": {"en": "", "zh": ""}, "confusions": [],
+            "model_notes": f"调用失败：{ex}"}
+
+
 def _backoff(i: int): time.sleep(min(8.0, 0.6*(2**i)+random.uniform(0, 0.25)))
 
 
@@ -73,76 +240,87 @@ def enrich_file(
     checkpoint_every: int = 20,
     only_fix_missing: bool = False,
     progress_cb: Optional[Callable[[int, int], None]] = None,
-    show_tqdm: bool = False
+    show_tqdm: bool = False,
+    use_cache: bool = True,
+    words_per_request: int = 1
 ) -> Path:
+    """
+    words_per_request > 1 时每个请求扩充多个词（enrich_many），系统提示只发一次；
+    batch_size 仍是并发请求数。
+    每个完成的词立即追加到旁路日志 <output>.journal.jsonl（enrich/journal.py），
+    output_json 只在结束时写一次；checkpoint_every 为日志 fsync 的间隔（词数）。
+    """
     items = load_vocab_array(input_json)
     total = len(items)
 
-    resume = try_load_resume(output_json)
-    resume_entries = None
-    if resume and resume.get("meta", {}).get("source") == str(input_json.resolve()):
-        resume_entries = resume.get("entries", [])
-        print(
-            f"[resume] Found {len(resume_entries)}/{total} done; resume from there.")
-
-    results: Dict[int, Dict[str, Any]] = {}
-    done = 0
-    if resume_entries:
-        for i, e in enumerate(resume_entries):
-            results[i] = e
-        done = len(resume_entries)
+    results = load_resume(output_json, input_json, total)
+    done = len(results)
+    if results:
+        print(f"[resume] Found {done}/{total} done; resume from there.")
         if progress_cb:
             progress_cb(done, total)
+    journal = EnrichJournal(output_json, input_json, total, sync_every=checkpoint_every).open()
 
+    # 连接池至少容纳 batch_size 个并发请求（共享客户端，keep-alive 复用）
+    ensure_pool_size(batch_size)
+    cache_hits0 = default_cache().hits if use_cache else 0
     lock = threading.Lock()
     pbar = tqdm(total=total, initial=done, disable=not show_tqdm)
 
-    def worker(i: int):
-        word = items[i]["word"]
-        meaning = items[i]["meaning"]
-        if only_fix_missing and not need_fix(meaning):
-            return i, {"word": word, "meaning_zh": meaning, "pos": "", "synonyms_en": [],
-                       "phrases": [], "example": {"en": "", "zh": ""}, "confusions": [], "model_notes": "原释义较完整，未调用LLM。"}
+    def worker(idx: List[int]) -> List[Tuple[int, Dict[str, Any]]]:
+        out, ask = [], []
+        for i in idx:
+            word = items[i]["word"]
+            meaning = items[i]["meaning"]
+            if only_fix_missing and not need_fix(meaning):
+                out.append((i, skipped_entry(word, meaning)))
+            else:
+                ask.append(i)
+        if not ask:
+            return out
         for attempt in range(5):
             try:
-                return i, enrich_one(word, meaning)
+                if len(ask) == 1:
+                    i = ask[0]
+                    objs = [enrich_one(items[i]["word"], items[i]["meaning"], use_cache=use_cache)]
+                else:
+                    objs = enrich_many([(items[i]["word"], items[i]["meaning"]) for i in ask],
+                                       use_cache=use_cache)
+                return out + list(zip(ask, objs))
             except Exception as ex:
                 if attempt == 4:
-                    return i, {"word": word, "meaning_zh": meaning, "pos": "", "synonyms_en": [],
-                               "phrases": [], "example": {"en": "", "zh": ""}, "confusions": [],
-                               "model_notes": f"调用失败：{ex}"}
+                    return out + [(i, failed_entry(items[i]["word"], items[i]["meaning"], ex))
+                                  for i in ask]
                 _backoff(attempt)
 
-    # 提交任务
-    with ThreadPoolExecutor(max_workers=max(1, batch_size)) as ex:
-        futs = [ex.submit(worker, i) for i in range(done, total)]
-        for fut in as_completed(futs):
-            i, enriched = fut.result()
-            with lock:
-                results[i] = enriched
-                done += 1
-                if checkpoint_every and (done % checkpoint_every == 0 or done == total):
-                    entries = [results[j]
-                               for j in range(0, done) if j in results]
-                    payload = {"meta": {
-                        "source": str(input_json.resolve()),
-                        "model": MODEL_NAME,
-                        "count": len(entries),
-                        "status": "partial" if done < total else "complete",
-                        "progress": {"done": done, "total": total, "checkpoint_every": checkpoint_every},
-                        "batch_size": batch_size
-                    },
-                        "entries": entries}
-                    dump_json_atomic(output_json, payload)
-                if progress_cb:
-                    progress_cb(done, total)
-                pbar.update(1)
+    # 提交任务：每个任务 words_per_request 个未完成的词（续跑时完成的词可能不连续）
+    wpr = max(1, words_per_request)
+    todo = [i for i in range(total) if i not in results]
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, batch_size)) as ex:
+            futs = [ex.submit(worker, todo[j:j + wpr]) for j in range(0, len(todo), wpr)]
+            for fut in as_completed(futs):
+                for i, enriched in fut.result():
+                    with lock:
+                        results[i] = enriched
+                        journal.append(i, enriched)
+                        done += 1
+                        if progress_cb:
+                            progress_cb(done, total)
+                        pbar.update(1)
+    finally:
+        journal.close()
 
     pbar.close()
 
     entries = [results[j] for j in range(total) if j in results]
     payload = {"meta": {"source": str(input_json.resolve()), "model": MODEL_NAME,
-                        "count": len(entries), "status": "complete", "batch_size": batch_size},
+                        "count": len(entries), "status": "complete", "batch_size": batch_size,
+                        "words_per_request": wpr},
                "entries": entries}
+    if use_cache:
+        # 本次运行中由缓存直接给出的词数（这些词没有调用 LLM）
+        payload["meta"]["cache_hits"] = default_cache().hits - cache_hits0
     dump_json_atomic(output_json, payload)
+    journal.remove()
     return output_json
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+enrich 的追加式检查点：<output>.journal.jsonl
+
+以前每 checkpoint_every 个词就把已完成的全部条目重写进输出 JSON，总写入量随词表长度平方增长。
+现在每完成一个词就往旁路日志追加一行，最终的 {"meta", "entries"} 文档只在结束时
+（或 snapshot() 按需）组装一次；检查点 I/O 与新增工作量成正比。
+
+  {"meta": {"source": ..., "model": ..., "total": N}}    第一行：与输入文件绑定
+  [i, {...entry...}]                                      之后每行一个完成的词（i 为输入下标）
+
+- 每行写完即 flush（进程崩溃最多丢失在途的那一批）；每 sync_every 行 fsync 一次；
+- 完成顺序任意，续跑时按下标补齐缺口，不要求连续前缀；
+- 末尾被截断的行（写到一半崩溃）读取时忽略；
+- 输入文件或词数变了，旧日志作废重建。
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import orjson
+
+from config import MODEL_NAME
+from utils.jsonio import dump_json_atomic, load_vocab_array, try_load_resume
+
+
+def journal_path(output_json: Path) -> Path:
+    output_json = Path(output_json)
+    return output_json.with_name(output_json.name + ".journal.jsonl")
+
+
+class EnrichJournal:
+    def __init__(self, output_json: Path, source: Path, total: int, sync_every: int = 20):
+        self.path = journal_path(output_json)
+        self.source = str(Path(source).resolve())
+        self.total = total
+        self.sync_every = max(0, sync_every)
+        self._lock = threading.Lock()
+        self._f = None
+        self._unsynced = 0
+
+    def _header(self) -> Dict[str, Any]:
+        return {"meta": {"source": self.source, "model": MODEL_NAME, "total": self.total}}
+
+    def _matches(self, header: Any) -> bool:
+        meta = header.get("meta") if isinstance(header, dict) else None
+        return isinstance(meta, dict) and meta.get("source") == self.source \
+            and meta.get("total") == self.total
+
+    def load(self) -> Dict[int, Dict[str, Any]]:
+        """已完成的条目（下标 -> entry）；日志不存在或不属于当前输入时返回空"""
+        out: Dict[int, Dict[str, Any]] = {}
+        try:
+            raw = self.path.read_bytes()
+        except OSError:
+            return out
+        lines = raw.split(b"\n")
+        try:
+            if not self._matches(orjson.loads(lines[0])):
+                return out
+        except orjson.JSONDecodeError:
+            return out
+        for line in lines[1:]:
+            try:
+                i, entry = orjson.loads(line)
+            except (orjson.JSONDecodeError, TypeError, ValueError):
+                continue  # 空行或截断的最后一行
+            if isinstance(i, int) and 0 <= i < self.total and isinstance(entry, dict):
+                out[i] = entry
+        return out
+
+    def open(self, resume: bool = True):
+        """resume=True 且日志属于当前输入时接着追加，否则重建（写入新的头部）"""
+        with self._lock:
+            fresh = not (resume and self._header_ok())
+            self._f = self.path.open("wb" if fresh else "ab")
+            if fresh:
+                self._f.write(orjson.dumps(self._header()) + b"\n")
+                self._f.flush()
+            elif self._f.tell() and not self._ends_with_newline():
+                # 上次崩溃留下半行：补一个换行，不让新行粘在它后面
+                self._f.write(b"\n")
+        return self
+
+    def _header_ok(self) -> bool:
+        try:
+            with self.path.open("rb") as f:
+                return self._matches(orjson.loads(f.readline()))
+        except (OSError, orjson.JSONDecodeError):
+            return False
+
+    def _ends_with_newline(self) -> bool:
+        with self.path.open("rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def append(self, i: int, entry: Dict[str, Any]):
+        line = orjson.dumps([i, entry]) + b"\n"
+        with self._lock:
+            self._f.write(line)
+            self._f.flush()
+            self._unsynced += 1
+            if self.sync_every and self._unsynced >= self.sync_every:
+                os.fsync(self._f.fileno())
+                self._unsynced = 0
+
+    def close(self):
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+
+    def remove(self):
+        """最终文档写好后删除日志"""
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def load_resume(output_json: Path, source: Path, total: int) -> Dict[int, Dict[str, Any]]:
+    """
+    续跑用的已完成条目：旧格式的部分输出（entries 为连续前缀）+ 旁路日志。
+    """
+    done: Dict[int, Dict[str, Any]] = {}
+    resume = try_load_resume(Path(output_json))
+    if resume and resume.get("meta", {}).get("source") == str(Path(source).resolve()):
+        for i, e in enumerate(resume.get("entries", [])[:total]):
+            done[i] = e
+    done.update(EnrichJournal(output_json, source, total).load())
+    return done
+
+
+def snapshot(input_json: Path, output_json: Path, dest: Optional[Path] = None) -> Path:
+    """
+    按需把当前进度组装成 {"meta", "entries"}（entries 为连续完成的前缀，status=partial），
+    写到 dest（默认 output_json）；运行中的 enrich 不受影响。
+    """
+    total = len(load_vocab_array(Path(input_json)))
+    done = load_resume(output_json, input_json, total)
+    prefix = 0
+    while prefix in done:
+        prefix += 1
+    dest = Path(dest or output_json)
+    entries = [done[j] for j in range(prefix)]
+    dump_json_atomic(dest, {"meta": {
+        "source": str(Path(input_json).resolve()),
+        "model": MODEL_NAME,
+        "count": len(entries),
+        "status": "partial" if len(done) < total else "complete",
+        "progress": {"done": len(done), "total": total}
+    },
+        "entries": entries})
+    return dest
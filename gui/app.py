@@ -16,6 +16,7 @@ from study.grader import grade_with_llm   # 仍保留 Study 页使用
 from study.sampler import weighted_sample_without_replacement, anti_repeat_filter, mark_scheduled
 from agent.propose import propose_from_text
 from utils.jsonio import dump_json_atomic, load_json
+from utils.word_index import WordIndex, normalize_query_word as _normalize_query_word
 from .widgets import LineEntry, LogBox, ProgBar, Worker
 
 CHAT_DIR = Path("data/chats")
@@ -26,15 +27,6 @@ CHAT_DIR.mkdir(parents=True, exist_ok=True)
 
 
 
-def _normalize_query_word(w: str) -> str:
-    if not w: return w
-    wl = w.strip().lower()
-    if len(wl) > 3 and wl.endswith("ies"): return wl[:-3] + "y"
-    if len(wl) > 2 and wl.endswith("es"): return wl[:-2]
-    if len(wl) > 2 and wl.endswith("s"): return wl[:-1]
-    return wl
-
-
 def _must_pick_store_or_raise(entry_widget: LineEntry) -> Path:
     p = (entry_widget.get() or "").strip()
     if not p: raise RuntimeError("请先选择词库 JSON（enriched.json）后再聊天或写库。")
@@ -457,16 +449,9 @@ class App(tk.Tk):
                 "sched", {"times_scheduled": 0})
             return e
 
-        def find_idx(w: str):
-            wl = (w or "").strip().lower()
-            entries = store.get("entries", [])
-            for i, e in enumerate(entries):
-                if (e.get("word") or "").lower() == wl: return i
-            base = _normalize_query_word(wl)
-            if base != wl:
-                for i, e in enumerate(entries):
-                    if (e.get("word") or "").lower() == base: return i
-            return -1
+        # 每次载入建一次索引，之后按词查找为 O(1)
+        index = WordIndex(store.get("entries", []))
+        find_idx = index.lookup
 
         # ---- 现有工具（略微省略重复代码，逻辑同前版本）----
         if name == "get_word":
@@ -491,6 +476,7 @@ class App(tk.Tk):
                 for t in tags:
                     if t not in e["tags"]: e["tags"].append(t)
                 store.setdefault("entries", []).append(e)
+                index.add(len(store["entries"]) - 1, e.get("word", ""))
             else:
                 e = norm_entry(store["entries"][idx])
                 if not e.get("meaning_zh"):
@@ -12,6 +12,7 @@ from tkinter import filedialog, messagebox
 from api_client import setup_client
 from config import MODEL_NAME
 from utils.jsonio import load_json, dump_json_atomic
+from utils.word_index import WordIndex, normalize_query_word as _normalize_word
 from study.sampler import weighted_sample_without_replacement, anti_repeat_filter, mark_scheduled
 from study.srs import DEFAULT_SRS, ensure, update
 from agent.propose import propose_from_text  # 若暂时不用，可忽略
@@ -23,19 +24,6 @@ CHAT_DIR.mkdir(parents=True, exist_ok=True)
 # ----------------- 小工具 -----------------
 
 
-def _normalize_word(w: str) -> str:
-    if not w:
-        return w
-    w = w.strip().lower()
-    if len(w) > 3 and w.endswith("ies"):
-        return w[:-3] + "y"
-    if len(w) > 2 and w.endswith("es"):
-        return w[:-2]
-    if len(w) > 2 and w.endswith("s"):
-        return w[:-1]
-    return w
-
-
 def _must_pick_store_or_raise(path_str: str) -> Path:
     p = (path_str or "").strip()
     if not p:
@@ -440,17 +428,9 @@ class ModernApp(ctk.CTk):
             e.setdefault("sched", {"times_scheduled": 0})
             return e
 
-        def find_idx(w: str):
-            wl = (w or "").strip().lower()
-            for i, e in enumerate(store.get("entries", [])):
-                if (e.get("word", "").lower() == wl):
-                    return i
-            base = _normalize_word(wl)
-            if base != wl:
-                for i, e in enumerate(store.get("entries", [])):
-                    if (e.get("word", "").lower() == base):
-                        return i
-            return -1
+        # 每次载入建一次索引，之后按词查找为 O(1)
+        index = WordIndex(store.get("entries", []))
+        find_idx = index.lookup
 
         # 具体工具
         if name == "get_word":
@@ -467,7 +447,7 @@ class ModernApp(ctk.CTk):
             w = args.get("word", "") or ""
             idx = find_idx(w)
             if idx == -1:
-                enriched = enrich_one(setup_client(), _normalize_word(
+                enriched = enrich_one(_normalize_word(
                     w), args.get("meaning_hint", "") or "")
                 e = norm(enriched)
                 src = args.get("source", "chat")
@@ -480,10 +460,11 @@ class ModernApp(ctk.CTk):
                     if t not in e["tags"]:
                         e["tags"].append(t)
                 store.setdefault("entries", []).append(e)
+                index.add(len(store["entries"]) - 1, e.get("word", ""))
             else:
                 e = norm(store["entries"][idx])
                 if not e.get("meaning_zh"):
-                    enriched = enrich_one(setup_client(), e.get(
+                    enriched = enrich_one(e.get(
                         "word", ""), e.get("meaning_zh", ""))
                     for k in ["meaning_zh", "pos", "synonyms_en", "phrases", "example", "confusions", "model_notes"]:
                         if k in enriched and enriched[k]:
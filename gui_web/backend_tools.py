@@ -3,9 +3,11 @@ import json
 import time
 import copy
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Tuple
 
+from study import srs_table
 from study.srs import ensure_state, commit
+from gui_web.store_backend import open_store, entry_srs
 from study.sampler import (
     sample_study_items as _sample_study_items,
     plan_daily_new as _plan_daily_new,
@@ -16,37 +18,15 @@ from study.sampler import (
 
 
 def _load_store(path: Path) -> Dict[str, Any]:
-    if not path.exists():
-        path.write_text(json.dumps(
-            {"entries": []}, ensure_ascii=False, indent=2), encoding="utf-8")
-    try:
-        obj = json.loads(path.read_text(encoding="utf-8"))
-        # tolerate top-level list
-        if isinstance(obj, list):
-            return {"entries": obj}
-        return obj
-    except Exception:
-        return {"entries": []}
+    return open_store(path).load()
 
 
 def _save_store(path: Path, data: Dict[str, Any]):
-    path.write_text(json.dumps(data, ensure_ascii=False,
-                    indent=2), encoding="utf-8")
+    open_store(path).save(data)
 
 
 # ---------- utils ----------
 
-def _find_entry(entries, word: str):
-    for e in entries:
-        if isinstance(e, dict):
-            if e.get("word") == word:
-                return e
-            ent = e.get("entry")
-            if isinstance(ent, dict) and ent.get("word") == word:
-                return e
-    return None
-
-
 def _entry_word(e: dict) -> str | None:
     if e.get("word"):
         return e["word"]
@@ -117,87 +97,196 @@ def _normalize_one_entry(e: dict) -> dict:
     return ee
 
 
-def _normalize_entries(entries: List[dict]) -> List[dict]:
-    return [_normalize_one_entry(e) for e in entries if isinstance(e, dict)]
-
-
-def _fallback_first_k(entries: List[dict], k: int) -> List[dict]:
-    out = []
-    for e in entries:
-        w = _entry_word(e)
-        if not w:
-            continue
-        ent = (e.get("entry") if isinstance(e.get("entry"), dict) else e) or {}
-        out.append({"word": w, "entry": ent})
-        if len(out) >= k:
-            break
-    return out
+class NormalizedView:
+    """
+    Read-only view of the store for the samplers. Each row is a small
+    {"word", "srs", "_i"} dict that shares the raw srs block (no copies); the
+    samplers coerce the scheduling fields lazily via study.srs.read_state.
+    Only the items a sampler returns are materialized into numeric-safe copies.
+
+    With a columnar `table` (study.srs_table, same row order) the batch
+    samplers run on it, and with a `due` index (study.due_index) the study
+    sampler reads due/new cards straight from it; then the row dicts are
+    never built.
+    """
+
+    __slots__ = ("raw", "table", "due", "_rows")
+
+    def __init__(self, entries_raw: List[dict], table=None, due=None):
+        self.raw = entries_raw
+        self.table = table
+        self.due = due
+        self._rows: List[dict] | None = None
+
+    @property
+    def rows(self) -> List[dict]:
+        if self._rows is None:
+            rows = []
+            for i, e in enumerate(self.raw):
+                if not isinstance(e, dict):
+                    continue
+                w = _entry_word(e)
+                if w:
+                    rows.append({"word": w, "srs": entry_srs(e), "_i": i})
+            self._rows = rows
+        return self._rows
+
+    def materialize(self, items: List[dict]) -> List[dict]:
+        return [{"word": it["word"], "entry": _normalize_one_entry(self.raw[it["entry"]["_i"]])}
+                for it in items]
+
+    def materialize_at(self, positions) -> List[dict]:
+        """entries positions -> items (same shape as materialize)"""
+        out = []
+        for i in positions:
+            e = self.raw[int(i)]
+            out.append({"word": _entry_word(e), "entry": _normalize_one_entry(e)})
+        return out
+
+    def materialize_rows(self, rows: List[int]) -> List[dict]:
+        """table row numbers -> items"""
+        return self.materialize_at(self.table.pos[r] for r in rows)
+
+    def first_k(self, k: int) -> List[dict]:
+        """robust fallback: the first k entries, in store order"""
+        out = []
+        for r in self.rows[:max(0, k)]:
+            e = _normalize_one_entry(self.raw[r["_i"]])
+            ent = (e.get("entry") if isinstance(e.get("entry"), dict) else e) or {}
+            out.append({"word": r["word"], "entry": ent})
+        return out
+
+
+# ---------- tool registry ----------
+# Each tool declares how much of the store it needs; apply_tool dispatches on the
+# name first and only loads that much.
+NEEDS_NONE = "none"          # no store access at all
+NEEDS_RAW = "raw"            # raw entries list (read-only)
+NEEDS_ENTRY = "entry"        # one entry looked up by args["word"] (casefold / plural fallback)
+NEEDS_ENTRY_EXACT = "exact"  # one entry whose word is exactly args["word"] (write tools)
+NEEDS_NORMALIZED = "norm"    # NormalizedView of the entries for the samplers
+
+_TOOLS: Dict[str, Tuple[str, Callable[..., Dict[str, Any]]]] = {}
+
+
+def tool(name: str, needs: str = NEEDS_NONE):
+    def deco(fn):
+        _TOOLS[name] = (needs, fn)
+        return fn
+    return deco
+
+
+def tool_needs(name: str) -> str | None:
+    spec = _TOOLS.get((name or "").strip())
+    return spec[0] if spec else None
+
+
+@tool("record_signal_tool")
+def _t_record_signal(args: Dict[str, Any]) -> Dict[str, Any]:
+    # lightweight telemetry; no persistence
+    return {"ok": True}
+
+
+@tool("get_word", needs=NEEDS_ENTRY)
+def _t_get_word(args: Dict[str, Any], store, e: dict) -> Dict[str, Any]:
+    ent = e.get("entry") if isinstance(e.get("entry"), dict) else e
+    return {"ok": True, "entry": ent}
+
+
+@tool("commit_review", needs=NEEDS_ENTRY_EXACT)
+def _t_commit_review(args: Dict[str, Any], store, e: dict) -> Dict[str, Any]:
+    override = args.get("override_score", None)
+    payload = e.get("srs") or e.get("review") or {}
+    s = ensure_state(payload)
+    outcome = 1.0 if (override is None) else _safe_float(override, 1.0)
+    s = commit(s, outcome=outcome)
+    # single-entry write (one row for SQLite stores)
+    store.update_srs(_entry_word(e), s, outcome=outcome)
+    return {"ok": True, "srs": s}
+
+
+@tool("sample_study_items", needs=NEEDS_NORMALIZED)
+def _t_sample_study_items(args: Dict[str, Any], view: NormalizedView) -> Dict[str, Any]:
+    k = _safe_int(args.get("k", 20), 20)
+    min_days_gap = _safe_float(args.get("min_days_gap", 1.0), 1.0)
+    try:
+        if view.table is not None:
+            items = view.materialize_rows(srs_table.sample_study_items_batch(
+                view.table, k=k, min_days_gap=min_days_gap))
+        elif view.due is not None:
+            items = view.materialize_at(view.due.sample_study_items(
+                k=k, min_days_gap=min_days_gap))
+        else:
+            items = view.materialize(_sample_study_items(
+                view.rows, k=k, min_days_gap=min_days_gap))
+    except Exception as ex:
+        # robust fallback
+        items = view.first_k(k)
+    return {"ok": True, "items": items}
+
+
+@tool("plan_daily_new", needs=NEEDS_NORMALIZED)
+def _t_plan_daily_new(args: Dict[str, Any], view: NormalizedView) -> Dict[str, Any]:
+    k = _safe_int(args.get("k", 100), 100)
+    try:
+        if view.table is not None:
+            items = view.materialize_rows(srs_table.plan_daily_new_batch(view.table, k=k))
+        else:
+            items = view.materialize(_plan_daily_new(view.rows, k=k))
+    except Exception as ex:
+        items = view.first_k(k)
+    return {"ok": True, "items": items}
+
+
+@tool("sample_by_priority", needs=NEEDS_NORMALIZED)
+def _t_sample_by_priority(args: Dict[str, Any], view: NormalizedView) -> Dict[str, Any]:
+    k = _safe_int(args.get("k", 100), 100)
+    try:
+        if view.table is not None:
+            items = view.materialize_rows(srs_table.sample_by_priority_batch(view.table, k=k))
+        else:
+            items = view.materialize(_sample_by_priority(view.rows, k=k))
+    except Exception:
+        items = view.first_k(k)
+    return {"ok": True, "items": items}
 
 
 # ---------- tool entry ----------
 
 def apply_tool(name: str, args: Dict[str, Any], store_path: Path) -> Dict[str, Any]:
-    data = _load_store(store_path)
-    entries_raw = data.get("entries") or data.get("words") or []
-    # numeric-safe copy for samplers; keep raw for read/write ops
-    entries_norm = _normalize_entries(entries_raw)
     name = (name or "").strip()
-
-    if name == "record_signal_tool":
-        # lightweight telemetry; no persistence
-        return {"ok": True}
-
-    if name == "get_word":
-        w = (args or {}).get("word") or ""
-        e = _find_entry(entries_raw, w)
-        if not e:
-            return {"ok": False, "error": f"word not found: {w}"}
-        ent = e.get("entry") if isinstance(e.get("entry"), dict) else e
-        return {"ok": True, "entry": ent}
-
-    if name == "commit_review":
-        w = (args or {}).get("word") or ""
-        override = (args or {}).get("override_score", None)
-        e = _find_entry(entries_raw, w)
+    spec = _TOOLS.get(name)
+    if spec is None:
+        return {"ok": False, "error": f"unknown tool: {name}"}
+    needs, fn = spec
+    args = args or {}
+
+    if needs == NEEDS_NONE:
+        return fn(args)
+
+    store = open_store(store_path)
+    if needs in (NEEDS_ENTRY, NEEDS_ENTRY_EXACT):
+        w = args.get("word") or ""
+        e = store.get(w, exact=needs == NEEDS_ENTRY_EXACT)
         if not e:
             return {"ok": False, "error": f"word not found: {w}"}
-        payload = e.get("srs") or e.get("review") or {}
-        s = ensure_state(payload)
-        outcome = 1.0 if (override is None) else _safe_float(override, 1.0)
-        s = commit(s, outcome=outcome)
-        e["srs"] = s
-        _save_store(store_path, data)
-        return {"ok": True, "srs": s}
-
-    if name == "sample_study_items":
-        k = _safe_int((args or {}).get("k", 20), 20)
-        min_days_gap = _safe_float((args or {}).get("min_days_gap", 1.0), 1.0)
-        try:
-            items = _sample_study_items(
-                entries_norm, k=k, min_days_gap=min_days_gap)
-        except Exception as ex:
-            # robust fallback
-            items = _fallback_first_k(entries_norm, k)
-        return {"ok": True, "items": items}
-
-    if name == "plan_daily_new":
-        k = _safe_int((args or {}).get("k", 100), 100)
-        try:
-            items = _plan_daily_new(entries_norm, k=k)
-        except Exception as ex:
-            # Fix for: TypeError: bad operand type for unary -: 'str'
-            items = _fallback_first_k(entries_norm, k)
-        return {"ok": True, "items": items}
-
-    if name == "sample_by_priority":
-        k = _safe_int((args or {}).get("k", 100), 100)
-        try:
-            items = _sample_by_priority(entries_norm, k=k)
-        except Exception:
-            items = _fallback_first_k(entries_norm, k)
-        return {"ok": True, "items": items}
-
-    return {"ok": False, "error": f"unknown tool: {name}"}
+        return fn(args, store, e)
+
+    # a derived index comes with the document it was built from (one cache
+    # lookup), so a reload in between cannot pair rows with another document
+    table = due = None
+    if needs == NEEDS_NORMALIZED and hasattr(store, "doc_and_srs_table"):
+        data, table = store.doc_and_srs_table()
+        # without numpy the due index still avoids the full scan for study sampling
+        if table is None and name == "sample_study_items":
+            data, due = store.doc_and_due_index()
+    else:
+        data = store.load()
+    entries_raw = data.get("entries") or data.get("words") or []
+    if needs == NEEDS_RAW:
+        return fn(args, entries_raw)
+    # copy-free view; samplers materialize only what they return
+    return fn(args, NormalizedView(entries_raw, table, due))
 
 
 def redact_for_log(x: dict) -> dict:
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Coalescing background writer for small JSON documents (progress files).
+
+submit(path, doc) marks the file dirty and returns immediately; a daemon thread
+writes it atomically (tmp + replace) once the debounce window has passed since
+the first pending submit, so a burst of bridge calls costs one write. The
+document is serialized at write time, under the caller's `lock` if given, so
+callers keep mutating the same object and just submit it again.
+
+pending(path) returns the not-yet-written document so readers never see a
+stale file; flush() forces everything out (window close / store switch).
+"""
+import contextlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# default debounce window in seconds
+DEFAULT_WINDOW = 0.25
+
+
+def write_json_atomic(path: Path, doc: Any, lock=None):
+    with (lock or contextlib.nullcontext()):
+        text = json.dumps(doc, ensure_ascii=False, indent=2)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    tmp.replace(path)
+
+
+class _Job:
+    __slots__ = ("path", "doc", "lock", "due")
+
+    def __init__(self, path: Path, doc: Any, lock, due: float):
+        self.path = path
+        self.doc = doc
+        self.lock = lock
+        self.due = due
+
+
+class CoalescingWriter:
+    def __init__(self, window: float = DEFAULT_WINDOW):
+        self.window = window
+        self._cv = threading.Condition()
+        self._io = threading.Lock()
+        self._jobs: Dict[str, _Job] = {}
+        # jobs taken by a writer but not on disk yet (still visible to pending())
+        self._writing: Dict[str, _Job] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.submits = 0
+        self.writes = 0
+
+    @staticmethod
+    def key(path: Path) -> str:
+        return str(Path(path).resolve())
+
+    def submit(self, path: Path, doc: Any, lock=None):
+        k = self.key(path)
+        with self._cv:
+            self.submits += 1
+            job = self._jobs.get(k)
+            if job is None:
+                # the deadline is set by the first submit, so a steady stream of
+                # submits still reaches disk at least once per window
+                self._jobs[k] = _Job(Path(path), doc, lock, time.monotonic() + self.window)
+            else:
+                job.doc = doc
+                job.lock = lock
+            closed = self._closed
+            if not closed:
+                self._ensure_thread()
+                self._cv.notify()
+        if closed:
+            # after close() (interpreter shutdown): write through
+            self.flush(path)
+
+    def pending(self, path: Path) -> Any:
+        k = self.key(path)
+        with self._cv:
+            job = self._jobs.get(k) or self._writing.get(k)
+            return None if job is None else job.doc
+
+    def flush(self, path: Optional[Path] = None):
+        """write pending documents now (all, or just `path`)"""
+        with self._cv:
+            keys = list(self._jobs) if path is None else [self.key(path)]
+            jobs = [(k, self._jobs.pop(k)) for k in keys if k in self._jobs]
+            for k, job in jobs:
+                self._writing[k] = job
+        for k, job in jobs:
+            self._write(k, job)
+
+    def close(self):
+        with self._cv:
+            self._closed = True
+            self._cv.notify()
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cv:
+            return {"submits": self.submits, "writes": self.writes,
+                    "pending": len(self._jobs)}
+
+    # ---------- internals ----------
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="persist-writer",
+                                            daemon=True)
+            self._thread.start()
+
+    def _write(self, k: str, job: _Job):
+        try:
+            # serialize inside the io lock: whichever write runs last sees the
+            # latest state of the document
+            with self._io:
+                write_json_atomic(job.path, job.doc, job.lock)
+            with self._cv:
+                self.writes += 1
+        except Exception as e:
+            print(f"[persist] write failed: {job.path}: {e}")
+        finally:
+            with self._cv:
+                if self._writing.get(k) is job:
+                    del self._writing[k]
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while not self._jobs and not self._closed:
+                    self._cv.wait()
+                if self._closed:
+                    return
+                now = time.monotonic()
+                first = min(j.due for j in self._jobs.values())
+                if first > now:
+                    self._cv.wait(first - now)
+                    continue
+                ready = [(k, self._jobs.pop(k)) for k, j in list(self._jobs.items())
+                         if j.due <= now]
+                for k, job in ready:
+                    self._writing[k] = job
+            for k, job in ready:
+                self._write(k, job)
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Background precomputation of the study queues (daily plan, due queue, score queue).
+
+Jobs are registered by name with a compute function fn(store, *args). get()
+returns the precomputed result when it is still valid for the store's current
+generation and today's date, and computes it inline otherwise. Everything that
+changes the store or the day log calls invalidate(store): the generation is
+bumped and a daemon thread rebuilds every job with the arguments it was last
+asked for, once the bridge has been idle for `idle` seconds. The rebuilds ride
+on the incrementally maintained store structures (SRS table, due index,
+counters, cached daily order), so they are cheap.
+
+A result computed while an invalidation happened is discarded, so get() never
+hands out a queue older than the last review. Jobs whose result depends on the
+clock (the due queue) carry a max_age and are refreshed in the background
+before they expire. The day is part of the key, so rollover rebuilds too.
+"""
+import datetime
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# default idle time before background rebuilds, in seconds
+DEFAULT_IDLE = 0.5
+# how often the worker looks for day rollover / expiring results
+_TICK = 30.0
+
+
+class _Job:
+    __slots__ = ("fn", "defaults", "max_age")
+
+    def __init__(self, fn: Callable, defaults: tuple, max_age: Optional[float]):
+        self.fn = fn
+        self.defaults = defaults
+        self.max_age = max_age
+
+
+class _Result:
+    __slots__ = ("gen", "day", "at", "value")
+
+    def __init__(self, gen: int, day: str, at: float, value: Any):
+        self.gen = gen
+        self.day = day
+        self.at = at
+        self.value = value
+
+
+def _store_key(store: Path) -> str:
+    return str(Path(store).resolve())
+
+
+def _today() -> str:
+    return datetime.date.today().isoformat()
+
+
+class Precomputer:
+    def __init__(self, idle: float = DEFAULT_IDLE):
+        self.idle = idle
+        self._jobs: Dict[str, _Job] = {}
+        self._cv = threading.Condition()
+        self._gen: Dict[str, int] = {}
+        # (store key, job name) -> args of the last request
+        self._args: Dict[Tuple[str, str], tuple] = {}
+        self._results: Dict[Tuple[str, str, tuple], _Result] = {}
+        self._stores: Dict[str, Path] = {}
+        self._current: Optional[str] = None
+        self._last_touch = 0.0
+        self._dirty = False
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+
+    def register(self, name: str, fn: Callable, defaults: tuple = (),
+                 max_age: Optional[float] = None):
+        self._jobs[name] = _Job(fn, tuple(defaults), max_age)
+
+    # ---------- bridge side ----------
+    def get(self, store: Path, name: str, args: tuple = ()) -> Any:
+        sk = _store_key(store)
+        args = tuple(args)
+        job = self._jobs[name]
+        with self._cv:
+            self._last_touch = time.monotonic()
+            self._stores[sk] = Path(store)
+            self._args[(sk, name)] = args
+            res = self._results.get((sk, name, args))
+            if res is not None and self._fresh(sk, job, res):
+                self.hits += 1
+                return res.value
+            self.misses += 1
+            gen = self._gen.get(sk, 0)
+        return self._compute(sk, name, job, args, gen)
+
+    def invalidate(self, store: Path):
+        """the store (or its day log) changed: drop results, rebuild when idle"""
+        sk = _store_key(store)
+        with self._cv:
+            self._gen[sk] = self._gen.get(sk, 0) + 1
+            for key in [key for key in self._results if key[0] == sk]:
+                del self._results[key]
+            self._last_touch = time.monotonic()
+            self._stores[sk] = Path(store)
+            self._dirty = True
+            self._wake()
+
+    def warm(self, store: Path):
+        """make `store` the current one and precompute its queues (startup / store switch)"""
+        sk = _store_key(store)
+        with self._cv:
+            self._stores[sk] = Path(store)
+            self._current = sk
+            self._dirty = True
+            self._wake()
+
+    def close(self):
+        with self._cv:
+            self._closed = True
+            self._cv.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cv:
+            return {"hits": self.hits, "misses": self.misses,
+                    "rebuilds": self.rebuilds, "cached": len(self._results)}
+
+    # ---------- internals ----------
+    def _fresh(self, sk: str, job: _Job, res: _Result, margin: float = 1.0) -> bool:
+        if res.gen != self._gen.get(sk, 0) or res.day != _today():
+            return False
+        return job.max_age is None or time.monotonic() - res.at < job.max_age * margin
+
+    def _compute(self, sk: str, name: str, job: _Job, args: tuple, gen: int) -> Any:
+        day = _today()
+        value = job.fn(self._stores[sk], *args)
+        if isinstance(value, dict) and value.get("ok") is False:
+            return value
+        with self._cv:
+            # an invalidation raced with the computation: do not keep the result
+            if self._gen.get(sk, 0) == gen:
+                self._results[(sk, name, args)] = _Result(gen, day, time.monotonic(), value)
+        return value
+
+    def _wake(self):
+        if self._closed:
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="precompute",
+                                            daemon=True)
+            self._thread.start()
+        self._cv.notify()
+
+    def _stale(self):
+        """(store key, name, job, args, gen) of every result that needs a rebuild"""
+        out = []
+        sk = self._current
+        keys = {key for key in self._args if key[0] == sk}
+        # jobs invalidated on other stores are rebuilt only if asked for again
+        for (s, name) in sorted(keys):
+            job = self._jobs.get(name)
+            if job is None:
+                continue
+            args = self._args[(s, name)]
+            res = self._results.get((s, name, args))
+            # refresh clock-dependent results at half their lifetime
+            if res is None or not self._fresh(s, job, res, margin=0.5):
+                out.append((s, name, job, args, self._gen.get(s, 0)))
+        for name, job in self._jobs.items():
+            if sk is not None and (sk, name) not in keys:
+                self._args[(sk, name)] = job.defaults
+                out.append((sk, name, job, job.defaults, self._gen.get(sk, 0)))
+        return out
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while not self._closed:
+                    now = time.monotonic()
+                    wait = self._last_touch + self.idle - now if self._dirty else _TICK
+                    if wait <= 0:
+                        break
+                    if not self._cv.wait(wait) and not self._dirty:
+                        # periodic check: day rollover and clock-dependent results
+                        self._dirty = True
+                        self._last_touch = 0.0
+                if self._closed:
+                    return
+                self._dirty = False
+                todo = self._stale()
+            for sk, name, job, args, gen in todo:
+                with self._cv:
+                    if self._closed or self._dirty:
+                        break
+                try:
+                    self._compute(sk, name, job, args, gen)
+                    with self._cv:
+                        self.rebuilds += 1
+                except Exception as e:
+                    print(f"[precompute] {name} failed: {e}")
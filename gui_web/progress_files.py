@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+On-disk layout of learning progress (replaces the monolithic data/progress.json):
+
+  data/settings.json                      {"recent_stores": [...], "last_store": "..."}
+  data/progress/<store_id>.json           {"store": "<resolved path>", "days": {"YYYY-MM-DD": {"words": [...]}},
+                                           "ever": [...]}
+  data/progress/<store_id>.session.json   {"store": "<resolved path>", "state": {...}}
+  data/progress/<store_id>.plan.json      {"store": "<resolved path>", "seed": "<day|store>",
+                                           "fp": "<sha1 of the entry words>",
+                                           "fresh": [...], "supplement": [...]}
+  data/progress/<store_id>.signals.jsonl  learning-signal event log (see gui_web.signal_log)
+
+Marking a word learned only rewrites that store's day log, and the bulky
+session snapshot lives in its own file, so neither grows with the number of
+stores. DayLog mirrors the word lists as sets, so learn events and
+"learned ever/today" checks are O(1). store_id is derived from the resolved
+store path and is stable across runs.
+
+The plan file caches the day's stable shuffle for the daily new-word plan;
+it is rebuilt whenever its seed (day, store) or the fingerprint of the
+store's word sequence (fp) no longer matches.
+
+migrate_legacy() splits an old progress.json once; the old file is left in place.
+"""
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+SETTINGS_NAME = "settings.json"
+PROGRESS_DIRNAME = "progress"
+LEGACY_NAME = "progress.json"
+
+
+def store_key(store: Path) -> str:
+    """the key progress.json used for a store: its resolved path"""
+    return str(Path(store).resolve())
+
+
+def store_id(key: str) -> str:
+    """'<file stem>-<sha1 of the resolved path>'; works for foreign (e.g. Windows) keys too"""
+    name = re.split(r"[\\/]", key)[-1]
+    stem = re.sub(r"[^0-9A-Za-z_.-]+", "_", name.rsplit(".", 1)[0])[:40] or "store"
+    return f"{stem}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}"
+
+
+def _read_json(path: Path) -> Optional[dict]:
+    try:
+        obj = json.loads(path.read_text(encoding="utf-8-sig"))
+    except Exception:
+        return None
+    return obj if isinstance(obj, dict) else None
+
+
+def _write_json(path: Path, doc: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+
+class DayLog:
+    """
+    One store's day log: the persisted document plus set mirrors of each
+    day's words and of every word ever learned ("ever" is kept in the file
+    too, so loading does not walk the whole history).
+    """
+
+    def __init__(self, doc: Optional[dict] = None, key: str = ""):
+        doc = doc if isinstance(doc, dict) else {}
+        doc.setdefault("store", key)
+        days = doc.get("days")
+        if not isinstance(days, dict):
+            days = doc["days"] = {}
+        self.doc = doc
+        self._days: Dict[str, Set[str]] = {}
+        for d, rec in days.items():
+            if isinstance(rec, dict) and isinstance(rec.get("words"), list):
+                self._days[d] = set(rec["words"])
+        ever = doc.get("ever")
+        if not isinstance(ever, list):
+            # older files: derive once from the history
+            ever = list(dict.fromkeys(w for d in days.values() if isinstance(d, dict)
+                                      for w in d.get("words") or []))
+            doc["ever"] = ever
+        self._ever: Set[str] = set(ever)
+
+    @property
+    def ever(self) -> Set[str]:
+        """every word ever recorded (read-only view for callers)"""
+        return self._ever
+
+    def day_set(self, day: str) -> Set[str]:
+        return self._days.get(day) or set()
+
+    def day_words(self, day: str) -> List[str]:
+        """the day's words in the order they were learned"""
+        rec = self.doc["days"].get(day)
+        return list(dict.fromkeys(rec.get("words") or [])) if isinstance(rec, dict) else []
+
+    def note(self, word: str, day: str) -> bool:
+        """record `word` as learned on `day`; False if it already was"""
+        seen = self._days.setdefault(day, set())
+        if word in seen:
+            return False
+        seen.add(word)
+        rec = self.doc["days"].get(day)
+        if not isinstance(rec, dict) or not isinstance(rec.get("words"), list):
+            rec = self.doc["days"][day] = {"words": []}
+        rec["words"].append(word)
+        if word not in self._ever:
+            self._ever.add(word)
+            self.doc["ever"].append(word)
+        return True
+
+
+class ProgressLayout:
+    def __init__(self, data_dir: Path):
+        self.data_dir = Path(data_dir)
+        self.settings_path = self.data_dir / SETTINGS_NAME
+        self.progress_dir = self.data_dir / PROGRESS_DIRNAME
+        self.legacy_path = self.data_dir / LEGACY_NAME
+
+    def day_log_path(self, store: Path, key: Optional[str] = None) -> Path:
+        return self.progress_dir / f"{store_id(key or store_key(store))}.json"
+
+    def session_path(self, store: Path, key: Optional[str] = None) -> Path:
+        return self.progress_dir / f"{store_id(key or store_key(store))}.session.json"
+
+    def plan_path(self, store: Path, key: Optional[str] = None) -> Path:
+        return self.progress_dir / f"{store_id(key or store_key(store))}.plan.json"
+
+    def signal_log_path(self, store: Path, key: Optional[str] = None) -> Path:
+        return self.progress_dir / f"{store_id(key or store_key(store))}.signals.jsonl"
+
+    def read_day_log(self, store: Path) -> dict:
+        """day log of one store; falls back to the legacy progress.json"""
+        doc = _read_json(self.day_log_path(store))
+        if doc is None and not self.settings_path.exists():
+            legacy = _read_json(self.legacy_path) or {}
+            doc = (legacy.get("stores") or {}).get(store_key(store))
+        return doc if isinstance(doc, dict) else {"days": {}}
+
+    def read_settings(self) -> dict:
+        doc = _read_json(self.settings_path)
+        if doc is None and not self.settings_path.exists():
+            doc = (_read_json(self.legacy_path) or {}).get("settings")
+        return doc if isinstance(doc, dict) else {}
+
+    def migrate_legacy(self) -> bool:
+        """split data/progress.json into the per-store layout (once)"""
+        if self.settings_path.exists() or not self.legacy_path.exists():
+            return False
+        legacy = _read_json(self.legacy_path)
+        if legacy is None:
+            return False
+        for key, prof in (legacy.get("stores") or {}).items():
+            if not isinstance(prof, dict):
+                continue
+            _write_json(self.day_log_path(None, key),
+                        {"store": key, "days": prof.get("days") or {}})
+            if prof.get("last_session") is not None:
+                _write_json(self.session_path(None, key),
+                            {"store": key, "state": prof["last_session"]})
+        # settings last: its presence marks the migration as done
+        _write_json(self.settings_path, legacy.get("settings") or {})
+        return True
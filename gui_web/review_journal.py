@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Append-only review journal for JSON stores.
+
+Instead of rewriting the whole store document to change one entry's srs block,
+each review appends one compact line next to the store:
+
+  store.json.journal:  {"w": "obedience", "ts": 1755400000.0, "o": 1.0, "srs": {...}}
+
+Events carry the resulting SRS state, so replaying them over the last snapshot
+is idempotent. JsonStore overlays the journal when it (re)loads the snapshot and
+folds it back into store.json (compaction) once it passes COMPACT_BYTES, on
+store switch, or on shutdown.
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.word_index import WordIndex
+
+# fold the journal into the snapshot once it grows past this many bytes
+COMPACT_BYTES = 256 * 1024
+
+
+def journal_path_for(store_path: Path) -> Path:
+    store_path = Path(store_path)
+    return store_path.with_name(store_path.name + ".journal")
+
+
+class ReviewJournal:
+    def __init__(self, store_path: Path):
+        self.path = journal_path_for(store_path)
+
+    def append(self, word: str, srs: dict, outcome: Optional[float] = None,
+               ts: Optional[float] = None) -> int:
+        """append one event; returns the journal size in bytes afterwards"""
+        ev: Dict[str, Any] = {"w": word, "ts": ts if ts is not None else time.time()}
+        if outcome is not None:
+            ev["o"] = outcome
+        ev["srs"] = srs
+        line = json.dumps(ev, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            return f.tell()
+
+    def events(self) -> Iterator[dict]:
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    ev = json.loads(line)
+                except Exception:
+                    # torn last line after a crash: skip it
+                    continue
+                if isinstance(ev, dict) and ev.get("w") and isinstance(ev.get("srs"), dict):
+                    yield ev
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def clear(self):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def replay(self, entries: List[dict]) -> int:
+        """overlay journal events onto `entries` in place; returns events applied"""
+        index: Optional[WordIndex] = None
+        n = 0
+        for ev in self.events():
+            if index is None:
+                index = WordIndex(entries)
+            # events carry the entry's own word (see JsonStore.update_srs)
+            i = index.exact(ev["w"])
+            if i >= 0 and isinstance(entries[i], dict):
+                entries[i]["srs"] = ev["srs"]
+                n += 1
+        return n
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Per-store learning-signal log (data/progress/<store_id>.signals.jsonl).
+
+One compact JSON array per line:
+
+  [ts, "word", "signal", "note"]       a signal (hint, start_forgot, verify, ...)
+  [ts, "word", "finalize", score]      the card was finalized with this signal score
+
+The web front end buffers signals and sends them in batches, so append() is
+one buffered write per batch. The bridge keeps the open (not yet finalized)
+events of each word in a bounded SignalTracker; when a word is no longer
+there (evicted, or the app restarted mid-card), open_events() recovers them
+from the tail of the log.
+
+Once the log passes ROTATE_BYTES it is rotated: the current file becomes
+<store_id>.signals.jsonl.1 (replacing the previous archive) and the new file
+starts with only the still-open events, so open_events() keeps working and
+disk use stays bounded at about two generations.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, List, Optional
+
+FINALIZE = "finalize"
+# how far back open_events() looks for a word's unfinished card
+TAIL_BYTES = 256 * 1024
+# rotate the log once it grows past this many bytes
+ROTATE_BYTES = 4 * TAIL_BYTES
+
+
+def _line(ts: float, word: str, signal: str, note: Any) -> str:
+    return json.dumps([round(ts, 3), word, signal, note], ensure_ascii=False,
+                      separators=(",", ":")) + "\n"
+
+
+class SignalLog:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.appended = 0
+        self.rotations = 0
+
+    @property
+    def archive_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".1")
+
+    def append(self, events: Iterable[dict]) -> int:
+        """events: [{"word", "signal", "note"?, "ts"?}, ...]; returns how many were written"""
+        now = time.time()
+        lines = []
+        for ev in events:
+            if not isinstance(ev, dict) or not ev.get("word") or not ev.get("signal"):
+                continue
+            try:
+                ts = float(ev.get("ts") or now)
+            except Exception:
+                ts = now
+            lines.append(_line(ts, str(ev["word"]), str(ev["signal"]), ev.get("note") or ""))
+        if lines:
+            self._write("".join(lines))
+            self.appended += len(lines)
+        return len(lines)
+
+    def finalize(self, word: str, score: Optional[float]):
+        self._write(_line(time.time(), word, FINALIZE, score))
+
+    def _write(self, text: str):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(text)
+                size = f.tell()
+            if size >= ROTATE_BYTES:
+                self._rotate()
+
+    def _rotate(self):
+        """archive the log and restart it with the events of unfinalized cards (lock held)"""
+        open_lines: dict = {}   # word key -> raw lines since its last finalize
+        with self.path.open("r", encoding="utf-8") as f:
+            for n, line in enumerate(f):
+                try:
+                    _, w, signal, _ = json.loads(line)
+                except Exception:
+                    continue
+                key = str(w).lower().strip()
+                if signal == FINALIZE:
+                    open_lines.pop(key, None)
+                else:
+                    open_lines.setdefault(key, []).append((n, line))
+        carry = sorted(x for lines in open_lines.values() for x in lines)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            f.writelines(line if line.endswith("\n") else line + "\n" for _, line in carry)
+        os.replace(self.path, self.archive_path)
+        os.replace(tmp, self.path)
+        self.rotations += 1
+
+    def open_events(self, word: str) -> List[tuple]:
+        """(signal, note) of `word` after its last finalize, from the log tail"""
+        key = (word or "").lower().strip()
+        with self._lock:
+            try:
+                with self.path.open("rb") as f:
+                    f.seek(0, os.SEEK_END)
+                    size = f.tell()
+                    f.seek(max(0, size - TAIL_BYTES))
+                    tail = f.read().decode("utf-8", errors="ignore")
+            except OSError:
+                return []
+        out: List[tuple] = []
+        for line in reversed(tail.splitlines()):
+            try:
+                ts, w, signal, note = json.loads(line)
+            except Exception:
+                continue  # the cut first line, or a torn write
+            if str(w).lower().strip() != key:
+                continue
+            if signal == FINALIZE:
+                break
+            out.append((signal, note or None))
+        out.reverse()
+        return out
@@ -0,0 +1,544 @@
+# -*- coding: utf-8 -*-
+"""
+Pluggable store engines for the web backend.
+
+- JsonStore:   the classic whole-document store.json / enrich_*.json file;
+               review writes are appended to a journal (see review_journal)
+- SqliteStore: one row per entry with indexed word + SRS columns, so a review
+               commit updates a single row in a single transaction
+
+Both keep running StoreStats counters (total / learned / mastered) that the
+review path updates per entry, so progress snapshots do not scan the entries.
+SqliteStore persists them in the same transaction as the row. JsonStore counts
+once per document load: the Tk apps, enrich and hand edits rewrite srs blocks
+without touching any counters, so saved ones could not be trusted.
+
+open_store(path) picks the engine from the file suffix. import_json / export_json
+convert between the two so existing JSON stores keep working.
+
+CLI:
+  python -m gui_web.store_backend import data/outputs/enrich_1.json data/enrich_1.sqlite
+  python -m gui_web.store_backend export data/enrich_1.sqlite data/outputs/enrich_1.json
+"""
+import argparse
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from gui_web.review_journal import COMPACT_BYTES, ReviewJournal
+from gui_web.store_cache import STORE_CACHE
+from study import srs_table
+from study.due_index import DueIndex
+from study.srs import entry_srs
+from utils.word_index import WordIndex, entry_word, normalize_query_word
+
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+
+
+# ---------- entry helpers ----------
+
+def _num(x, default=0.0) -> float:
+    try:
+        return float(x)
+    except Exception:
+        return default
+
+
+def _entries_of(data: Any) -> List[dict]:
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        return data.get("entries") or data.get("words") or []
+    return []
+
+
+# ---------- aggregate counters ----------
+
+def srs_tier(srs: Any) -> int:
+    """0 = not learned, 1 = learned, 2 = mastered (progress snapshot rules)"""
+    if not isinstance(srs, dict):
+        return 0
+    rc = int(_num(srs.get("review_count") or srs.get("n") or srs.get("reviews") or 0, 0))
+    if rc <= 0:
+        return 0
+    score = _num(srs.get("avg_score", srs.get("score", 0.5)), 0.5)
+    interval = _num(srs.get("interval_days", srs.get("interval", 0.0)), 0.0)
+    return 2 if rc >= 3 and (score >= 0.6 or interval >= 3.0) else 1
+
+
+def _tier_srs(e: Any) -> Any:
+    return (e.get("srs") or e.get("review")) if isinstance(e, dict) else None
+
+
+class StoreStats:
+    __slots__ = ("total", "learned", "mastered")
+
+    def __init__(self, total: int = 0, learned: int = 0, mastered: int = 0):
+        self.total = total
+        self.learned = learned
+        self.mastered = mastered
+
+    @classmethod
+    def scan(cls, entries: List[Any]) -> "StoreStats":
+        st = cls(total=len(entries))
+        for e in entries:
+            t = srs_tier(_tier_srs(e))
+            st.learned += t >= 1
+            st.mastered += t == 2
+        return st
+
+    @classmethod
+    def from_dict(cls, d: Any) -> Optional["StoreStats"]:
+        try:
+            return cls(int(d["total"]), int(d["learned"]), int(d["mastered"]))
+        except Exception:
+            return None
+
+    def apply(self, old_srs: Any, new_srs: Any):
+        """one entry's srs changed: move it between tiers"""
+        a, b = srs_tier(old_srs), srs_tier(new_srs)
+        self.learned += (b >= 1) - (a >= 1)
+        self.mastered += (b == 2) - (a == 2)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"total": self.total, "learned": self.learned, "mastered": self.mastered}
+
+
+# ---------- JSON ----------
+
+class JsonStore:
+    """
+    Whole-document JSON store (the original format). Reads and writes go
+    through STORE_CACHE, so repeated calls within a card round parse the file
+    only once. update_srs() only appends to the review journal; the snapshot is
+    rewritten by compact() / save().
+    """
+
+    kind = "json"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.journal = ReviewJournal(self.path)
+        self._lock = threading.RLock()
+        self._compacting = False
+
+    def ensure(self):
+        if not self.path.exists():
+            self.path.write_text(json.dumps(
+                {"entries": []}, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    @staticmethod
+    def _read(path: Path) -> Dict[str, Any]:
+        try:
+            obj = json.loads(path.read_text(encoding="utf-8-sig"))
+            # tolerate top-level list
+            if isinstance(obj, list):
+                obj = {"entries": obj}
+            if not isinstance(obj, dict):
+                obj = {"entries": []}
+        except Exception:
+            obj = {"entries": []}
+        # counters are recounted per load (see _stats_of); drop ones saved by
+        # earlier versions so save() does not carry them forward
+        obj.pop("stats", None)
+        # overlay reviews not yet folded into the snapshot
+        ReviewJournal(path).replay(_entries_of(obj))
+        return obj
+
+    @staticmethod
+    def _write(path: Path, data: Dict[str, Any]):
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False,
+                       indent=2), encoding="utf-8")
+        tmp.replace(path)
+
+    def load(self) -> Dict[str, Any]:
+        self.ensure()
+        return STORE_CACHE.get(self.path, self._read)
+
+    def save(self, data: Dict[str, Any]):
+        with self._lock:
+            STORE_CACHE.put(self.path, data, self._write)
+            # the snapshot now carries every journaled review
+            self.journal.clear()
+
+    def _doc_and_index(self):
+        self.ensure()
+        return STORE_CACHE.derive(self.path, self._read, "word_index",
+                                  lambda doc: WordIndex(_entries_of(doc)))
+
+    def index(self) -> WordIndex:
+        """word index of the cached document, built once per load"""
+        return self._doc_and_index()[1]
+
+    def doc_and_srs_table(self):
+        """
+        (cached document, its columnar SRS table) from one cache lookup, so the
+        table rows always line up with the returned document; the table is built
+        once per load and kept current by update_srs(); None without numpy
+        """
+        if not srs_table.available():
+            return self.load(), None
+        self.ensure()
+        return STORE_CACHE.derive(self.path, self._read, "srs_table",
+                                  lambda doc: srs_table.SRSTable.from_entries(_entries_of(doc)))
+
+    @staticmethod
+    def _stats_of(doc) -> StoreStats:
+        # one pass per (re)load, next to the parse that already touched every
+        # entry; after that only the in-memory running counters are used
+        return StoreStats.scan(_entries_of(doc))
+
+    def stats(self) -> StoreStats:
+        """running counters of the cached document (scanned once per load)"""
+        self.ensure()
+        return STORE_CACHE.derive(self.path, self._read, "stats", self._stats_of)[1]
+
+    def recompute_stats(self) -> Dict[str, Any]:
+        """verify the counters against a full scan and repair them"""
+        with self._lock:
+            st = self.stats()
+            before = st.as_dict()
+            fresh = StoreStats.scan(_entries_of(self.load()))
+            st.total, st.learned, st.mastered = fresh.total, fresh.learned, fresh.mastered
+        return {"before": before, "after": st.as_dict(), "matched": before == st.as_dict()}
+
+    def doc_and_due_index(self):
+        """(cached document, its next_due_ts index), kept current by update_srs()"""
+        self.ensure()
+        return STORE_CACHE.derive(self.path, self._read, "due_index",
+                                  lambda doc: DueIndex(_entries_of(doc)))
+
+    def _locate(self, word: str, exact: bool = False):
+        data, idx = self._doc_and_index()
+        i = idx.exact(word) if exact else idx.lookup(word)
+        entries = _entries_of(data)
+        if i < 0 or not isinstance(entries[i], dict):
+            return i, None
+        return i, entries[i]
+
+    def get(self, word: str, exact: bool = False) -> Optional[dict]:
+        """exact=False: casefold / plural-normalized query (reads); exact=True: the word itself (writes)"""
+        return self._locate(word, exact)[1]
+
+    def update_srs(self, word: str, srs: dict, outcome: Optional[float] = None) -> bool:
+        with self._lock:
+            stats = self.stats()
+            i, e = self._locate(word, exact=True)
+            if e is None:
+                return False
+            stats.apply(_tier_srs(e), srs)
+            e["srs"] = srs
+            table = STORE_CACHE.peek(self.path, "srs_table")
+            if table is not None:
+                row = table.row_of(i)
+                if row >= 0:
+                    table.update(row, srs)
+            due = STORE_CACHE.peek(self.path, "due_index")
+            if due is not None:
+                due.update(i, srs)
+            size = self.journal.append(entry_word(e), srs, outcome)
+        if size >= COMPACT_BYTES:
+            self.compact_async()
+        return True
+
+    def compact(self) -> bool:
+        """fold the journal into store.json; returns True if anything was written"""
+        with self._lock:
+            try:
+                if self.journal.size() == 0:
+                    return False
+                self.save(self.load())
+                return True
+            finally:
+                self._compacting = False
+
+    def compact_async(self):
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+        threading.Thread(target=self.compact, name="store-compact",
+                         daemon=True).start()
+
+    def close(self):
+        """flush pending journal events (the instance stays usable)"""
+        self.compact()
+
+
+# ---------- SQLite ----------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    pos           INTEGER PRIMARY KEY,
+    word          TEXT,
+    word_key      TEXT,
+    body          TEXT NOT NULL,
+    srs           TEXT,
+    review_count  INTEGER NOT NULL DEFAULT 0,
+    score         REAL,
+    next_due_ts   REAL NOT NULL DEFAULT 0,
+    last_ts       REAL NOT NULL DEFAULT 0,
+    interval_days REAL NOT NULL DEFAULT 0,
+    ease          REAL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_word ON entries(word);
+CREATE INDEX IF NOT EXISTS idx_entries_word_key ON entries(word_key);
+CREATE INDEX IF NOT EXISTS idx_entries_due ON entries(next_due_ts);
+CREATE INDEX IF NOT EXISTS idx_entries_review_count ON entries(review_count);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_SRS_COLS = "srs = ?, review_count = ?, score = ?, next_due_ts = ?, last_ts = ?, interval_days = ?, ease = ?"
+
+
+def _srs_columns(srs: dict) -> tuple:
+    """srs dict -> indexed scalar columns (same fallbacks as the samplers)."""
+    rc = srs.get("review_count", srs.get("n", srs.get("reviews", 0)))
+    score = srs.get("score", srs.get("avg_score"))
+    ease = srs.get("ease")
+    return (
+        int(_num(rc, 0)),
+        None if score is None else _num(score, 0.5),
+        _num(srs.get("next_due_ts", 0.0)),
+        _num(srs.get("last_ts", 0.0)),
+        _num(srs.get("interval_days", srs.get("interval", 0.0))),
+        None if ease is None else _num(ease, 0.0),
+    )
+
+
+def _dumps(x) -> str:
+    return json.dumps(x, ensure_ascii=False, separators=(",", ":"))
+
+
+class SqliteStore:
+    """
+    One row per entry. `body` keeps the entry JSON without its top-level srs
+    block, `srs` keeps that block, and the scheduling fields are mirrored into
+    indexed columns.
+    """
+
+    kind = "sqlite"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def ensure(self):
+        with self._lock:
+            self._db()
+
+    @staticmethod
+    def _row_of(pos: int, e: dict) -> tuple:
+        body = dict(e)
+        srs = body.pop("srs", None)
+        w = entry_word(e)
+        cols = _srs_columns(srs if isinstance(srs, dict) else entry_srs(e))
+        return (pos, w, w.casefold() if w else None, _dumps(body),
+                None if srs is None else _dumps(srs)) + cols
+
+    @staticmethod
+    def _entry_of(body: str, srs: Optional[str]) -> dict:
+        e = json.loads(body)
+        if srs is not None:
+            e["srs"] = json.loads(srs)
+        return e
+
+    def load(self) -> Dict[str, Any]:
+        with self._lock:
+            db = self._db()
+            rows = db.execute(
+                "SELECT body, srs FROM entries ORDER BY pos").fetchall()
+            meta = db.execute(
+                "SELECT value FROM meta WHERE key = 'doc'").fetchone()
+        data = json.loads(meta[0]) if meta else {}
+        data["entries"] = [self._entry_of(b, s) for b, s in rows]
+        return data
+
+    def save(self, data: Dict[str, Any]):
+        entries = [e for e in _entries_of(data) if isinstance(e, dict)]
+        doc = {k: v for k, v in (data.items() if isinstance(data, dict) else [])
+               if k not in ("entries", "words", "stats")}
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute("DELETE FROM entries")
+                db.executemany(
+                    "INSERT INTO entries (pos, word, word_key, body, srs, review_count, score,"
+                    " next_due_ts, last_ts, interval_days, ease) VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                    (self._row_of(i, e) for i, e in enumerate(entries)))
+                db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('doc', ?)",
+                           (_dumps(doc),))
+                self._put_stats(db, StoreStats.scan(entries))
+
+    # counters live in meta('stats') and change in the same transaction as the row
+    @staticmethod
+    def _put_stats(db: sqlite3.Connection, st: StoreStats):
+        db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('stats', ?)",
+                   (_dumps(st.as_dict()),))
+
+    def _scan_stats(self, db: sqlite3.Connection) -> StoreStats:
+        return StoreStats.scan([self._entry_of(b, s) for b, s in
+                                db.execute("SELECT body, srs FROM entries ORDER BY pos")])
+
+    def stats(self) -> StoreStats:
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT value FROM meta WHERE key = 'stats'").fetchone()
+            st = StoreStats.from_dict(json.loads(row[0])) if row else None
+            if st is None:
+                st = self._scan_stats(db)
+                with db:
+                    self._put_stats(db, st)
+            return st
+
+    def recompute_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            db = self._db()
+            before = self.stats().as_dict()
+            st = self._scan_stats(db)
+            with db:
+                self._put_stats(db, st)
+        return {"before": before, "after": st.as_dict(), "matched": before == st.as_dict()}
+
+    def _find_pos(self, word: str, exact: bool = False) -> Optional[int]:
+        """same order as WordIndex.lookup: exact, then (unless exact) casefold, then plural-normalized query"""
+        if not word:
+            return None
+        db = self._db()
+        keys = [("word", word)]
+        if not exact:
+            keys += [("word_key", word.strip().casefold()),
+                     ("word_key", normalize_query_word(word).casefold())]
+        for col, key in keys:
+            row = db.execute(
+                f"SELECT pos FROM entries WHERE {col} = ? ORDER BY pos LIMIT 1",
+                (key,)).fetchone()
+            if row:
+                return row[0]
+        return None
+
+    def get(self, word: str, exact: bool = False) -> Optional[dict]:
+        with self._lock:
+            pos = self._find_pos(word, exact)
+            row = None if pos is None else self._db().execute(
+                "SELECT body, srs FROM entries WHERE pos = ?", (pos,)).fetchone()
+        return self._entry_of(*row) if row else None
+
+    def update_srs(self, word: str, srs: dict, outcome: Optional[float] = None) -> bool:
+        # outcome is only journaled by JsonStore; the row update is already atomic
+        with self._lock:
+            db = self._db()
+            pos = self._find_pos(word, exact=True)
+            if pos is None:
+                return False
+            stats = self.stats()
+            body, old = db.execute(
+                "SELECT body, srs FROM entries WHERE pos = ?", (pos,)).fetchone()
+            old_srs = json.loads(old) if old else None
+            if not old_srs:
+                old_srs = json.loads(body).get("review")
+            stats.apply(old_srs, srs)
+            with db:
+                cur = db.execute(
+                    f"UPDATE entries SET {_SRS_COLS} WHERE pos = ?",
+                    (_dumps(srs),) + _srs_columns(srs) + (pos,))
+                self._put_stats(db, stats)
+            return cur.rowcount > 0
+
+    def close(self):
+        """release the connection (reopened lazily on next use)"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# ---------- registry ----------
+
+_OPEN: Dict[str, Any] = {}
+_OPEN_LOCK = threading.Lock()
+
+
+def is_sqlite_path(path: Path) -> bool:
+    return Path(path).suffix.lower() in SQLITE_SUFFIXES
+
+
+def open_store(path: Path):
+    """Return the (process-wide, reused) engine for `path`."""
+    key = str(Path(path).resolve())
+    with _OPEN_LOCK:
+        st = _OPEN.get(key)
+        if st is None:
+            st = SqliteStore(path) if is_sqlite_path(path) else JsonStore(path)
+            _OPEN[key] = st
+        return st
+
+
+def flush_store(path: Path):
+    """write out anything pending for `path` (journal compaction / db close)"""
+    key = str(Path(path).resolve())
+    with _OPEN_LOCK:
+        st = _OPEN.get(key)
+    if st is not None:
+        st.close()
+
+
+def close_all():
+    with _OPEN_LOCK:
+        stores = list(_OPEN.values())
+        _OPEN.clear()
+    for st in stores:
+        st.close()
+
+
+def import_json(src: Path, dst: Path) -> int:
+    """store.json / enrich_*.json -> SQLite store; returns entry count."""
+    data = JsonStore(src).load()
+    open_store(dst).save(data)
+    return len(_entries_of(data))
+
+
+def export_json(src: Path, dst: Path) -> int:
+    """SQLite store -> store.json-compatible document; returns entry count."""
+    data = open_store(src).load()
+    JsonStore(dst).save(data)
+    return len(_entries_of(data))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="JSON <-> SQLite store conversion")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_i = sub.add_parser("import", help="JSON store -> SQLite store")
+    p_i.add_argument("src", type=Path)
+    p_i.add_argument("dst", type=Path)
+    p_e = sub.add_parser("export", help="SQLite store -> JSON store")
+    p_e.add_argument("src", type=Path)
+    p_e.add_argument("dst", type=Path)
+    args = ap.parse_args()
+
+    if args.cmd == "import":
+        n = import_json(args.src, args.dst)
+    else:
+        n = export_json(args.src, args.dst)
+    print(f"✓ {args.cmd}: {n} entries -> {args.dst}")
+
+
+if __name__ == "__main__":
+    main()
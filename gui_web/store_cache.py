@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide cache of parsed store documents.
+
+Keyed by the resolved file path and validated by (st_mtime_ns, st_size), so an
+edit from outside the process is picked up on the next read. Writes go through
+put(), which writes the file and keeps the cached document hot.
+
+The cached document is shared: callers that mutate it must write it back via
+put() (or invalidate()). Data derived from a document (e.g. the word index) is
+memoized on its slot via derive(); it survives put() of the same document
+object (in-place edits keep it up to date themselves) and is dropped whenever a
+different document is cached.
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+Sig = Tuple[int, int]
+
+
+def _sig(path: Path) -> Optional[Sig]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class _Slot:
+    __slots__ = ("sig", "doc", "extras")
+
+    def __init__(self, sig: Optional[Sig], doc: Any):
+        self.sig = sig
+        self.doc = doc
+        self.extras: Dict[str, Any] = {}
+
+
+class StoreCache:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._slots: Dict[str, _Slot] = {}
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @staticmethod
+    def key(path: Path) -> str:
+        return str(Path(path).resolve())
+
+    def get(self, path: Path, loader: Callable[[Path], Any]) -> Any:
+        k = self.key(path)
+        with self._lock:
+            sig = _sig(path)
+            slot = self._slots.get(k)
+            if slot is not None and sig is not None and slot.sig == sig:
+                self.hits += 1
+                return slot.doc
+            self.misses += 1
+            # stat before reading: if the file changes mid-read the next get() reloads
+            doc = loader(path)
+            self._slots[k] = _Slot(sig, doc)
+            return doc
+
+    def derive(self, path: Path, loader: Callable[[Path], Any], name: str,
+               builder: Callable[[Any], Any]) -> Tuple[Any, Any]:
+        """(doc, builder(doc)) with the derived value memoized per cached doc"""
+        with self._lock:
+            doc = self.get(path, loader)
+            slot = self._slots[self.key(path)]
+            if name not in slot.extras:
+                slot.extras[name] = builder(doc)
+            return doc, slot.extras[name]
+
+    def peek(self, path: Path, name: str, doc: Any = None) -> Any:
+        """
+        derived value if already built for the cached doc (never builds or
+        reloads); with `doc`, only if that object is the cached document
+        """
+        with self._lock:
+            slot = self._slots.get(self.key(path))
+            if slot is None or (doc is not None and slot.doc is not doc):
+                return None
+            return slot.extras.get(name)
+
+    def put(self, path: Path, doc: Any, writer: Callable[[Path, Any], None]):
+        k = self.key(path)
+        with self._lock:
+            writer(path, doc)
+            self.writes += 1
+            old = self._slots.get(k)
+            if old is not None and old.doc is doc:
+                old.sig = _sig(path)
+            else:
+                self._slots[k] = _Slot(_sig(path), doc)
+
+    def invalidate(self, path: Optional[Path] = None):
+        with self._lock:
+            if path is None:
+                self._slots.clear()
+            else:
+                self._slots.pop(self.key(path), None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "cached": len(self._slots),
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.writes = 0
+
+
+STORE_CACHE = StoreCache()
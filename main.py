@@ -6,7 +6,10 @@ from tqdm import tqdm
 from gui.app import run as gui_run
 from extractor.pdf_extract import extract_pdf
 from enrich.enrich import enrich_file
+from enrich.async_engine import enrich_file_adaptive
+from enrich.journal import snapshot as enrich_snapshot
 from utils.jsonio import dump_json_atomic
+from config import DEFAULT_WORDS_PER_REQUEST, ENRICH_MAX_CONCURRENCY
 
 
 def cli():
@@ -24,8 +27,23 @@ def cli():
     p_e.add_argument("input_json", type=Path)
     p_e.add_argument("output_json", type=Path)
     p_e.add_argument("--batch-size", type=int, default=4)
-    p_e.add_argument("--checkpoint-every", type=int, default=20)
+    p_e.add_argument("--checkpoint-every", type=int, default=20,
+                     help="检查点日志（<output>.journal.jsonl）每多少个词 fsync 一次")
     p_e.add_argument("--only-fix-missing", action="store_true")
+    p_e.add_argument("--words-per-request", type=int, default=DEFAULT_WORDS_PER_REQUEST,
+                     help="每个 LLM 请求扩充的词数（建议 8~20；1 = 逐词请求）")
+    p_e.add_argument("--no-cache", action="store_true",
+                     help="不读写 LLM 扩充缓存（强制重新调用）")
+    p_e.add_argument("--adaptive", action="store_true",
+                     help="异步引擎 + 自适应并发（从 --batch-size 起步，429/超时减半）")
+    p_e.add_argument("--max-concurrency", type=int, default=ENRICH_MAX_CONCURRENCY,
+                     help="--adaptive 时的在途请求数上限")
+
+    p_s = sub.add_parser("enrich-snapshot",
+                         help="把进行中/中断的 enrich 检查点日志组装成 JSON（status=partial）")
+    p_s.add_argument("input_json", type=Path)
+    p_s.add_argument("output_json", type=Path)
+    p_s.add_argument("--to", type=Path, default=None, help="写到另一个文件（默认覆盖 output_json）")
 
     args = ap.parse_args()
     if args.cmd in (None, "gui"):
@@ -52,19 +70,30 @@ def cli():
         done = 0
         total = [0]
 
-        def progress(d, t):
+        def progress(d, t, info=None):
             nonlocal done
             done = d
             total[0] = t
             pbar.n = d
             pbar.total = t
+            if info:
+                pbar.set_postfix(info, refresh=False)
             pbar.refresh()
         pbar = tqdm(total=0, desc="Enriching")
-        res = enrich_file(args.input_json, args.output_json, batch_size=args.batch_size,
-                          checkpoint_every=args.checkpoint_every, only_fix_missing=args.only_fix_missing,
-                          progress_cb=progress, show_tqdm=False)
+        kwargs = dict(batch_size=args.batch_size, checkpoint_every=args.checkpoint_every,
+                      only_fix_missing=args.only_fix_missing, progress_cb=progress,
+                      show_tqdm=False, use_cache=not args.no_cache,
+                      words_per_request=args.words_per_request)
+        if args.adaptive:
+            res = enrich_file_adaptive(args.input_json, args.output_json,
+                                       max_concurrency=args.max_concurrency, **kwargs)
+        else:
+            res = enrich_file(args.input_json, args.output_json, **kwargs)
         pbar.close()
         print(f"✓ Enriched -> {res}")
+    elif args.cmd == "enrich-snapshot":
+        res = enrich_snapshot(args.input_json, args.output_json, args.to)
+        print(f"✓ Snapshot -> {res}")
 
 
 if __name__ == "__main__":
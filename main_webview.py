@@ -1,14 +1,24 @@
 # -*- coding: utf-8 -*-
 import json
 import datetime
+import heapq
 import threading
 from pathlib import Path
 import hashlib
 import webview
 
 from gui_web.backend_tools import apply_tool, redact_for_log
+from gui_web.store_backend import open_store, is_sqlite_path, flush_store, close_all
+from gui_web.store_cache import STORE_CACHE
+from gui_web.persist import CoalescingWriter
+from gui_web.precompute import Precomputer
+from gui_web.progress_files import DayLog, ProgressLayout, store_key
+from gui_web.signal_log import SignalLog
+from study.srs import ensure_state, commit
+from study.review_tracker import SignalTracker, compute_score
+from utils.word_index import entry_word
 from api_client import setup_client
-from config import MODEL_NAME
+from config import MODEL_NAME, PERSIST_WINDOW_MS, PRECOMPUTE_IDLE_MS
 
 APP_DIR = Path(__file__).resolve().parent
 WEB_DIR = APP_DIR if (APP_DIR / "index.html").exists() else APP_DIR / "web"
@@ -16,22 +26,26 @@ WEB_DIR = APP_DIR if (APP_DIR / "index.html").exists() else APP_DIR / "web"
 DATA_DIR = APP_DIR / "data"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 DEFAULT_STORE = DATA_DIR / "store.json"
-PROGRESS_PATH = DATA_DIR / "progress.json"
+# settings.json + progress/<store_id>.json (+ .session.json), see progress_files
+PROGRESS = ProgressLayout(DATA_DIR)
 
 _lock = threading.Lock()
+# progress files: writes are debounced by PERSIST; mutate the live documents only
+# while holding _progress_lock (the writer serializes them under the same lock)
+_progress_lock = threading.RLock()
+PERSIST = CoalescingWriter(PERSIST_WINDOW_MS / 1000.0)
 
 
 # ---------- helpers ----------
 def _ensure_store(path: Path):
-    if not path.exists():
-        path.write_text(json.dumps(
-            {"entries": []}, ensure_ascii=False, indent=2), encoding="utf-8")
+    open_store(path).ensure()
 
 
-def _ensure_progress():
-    if not PROGRESS_PATH.exists():
-        PROGRESS_PATH.write_text(json.dumps(
-            {"stores": {}, "settings": {}}, ensure_ascii=False, indent=2), encoding="utf-8")
+def _read_store(path: Path) -> dict:
+    try:
+        return open_store(path).load() or {}
+    except Exception:
+        return {}
 
 
 def _safe_read_json(path: Path):
@@ -55,28 +69,89 @@ def _safe_read_json(path: Path):
         return None
 
 
-def _progress_for_store(store: Path) -> dict:
-    _ensure_progress()
-    data = _safe_read_json(PROGRESS_PATH) or {}
-    stores = data.setdefault("stores", {})
-    key = str(store.resolve())
-    prof = stores.get(key)
-    if not prof:
-        prof = {"days": {}, "last_session": None}
-        stores[key] = prof
-        PROGRESS_PATH.write_text(json.dumps(
-            data, ensure_ascii=False, indent=2), encoding="utf-8")
-    return prof
+def _live_json(path: Path) -> dict | None:
+    """document at `path`, including a write still pending in PERSIST"""
+    data = PERSIST.pending(path)
+    if data is None:
+        data = _safe_read_json(path)
+    return data if isinstance(data, dict) else None
+
+
+# day log path -> DayLog, loaded once per process (this app is the only writer)
+_DAY_LOGS: dict[str, DayLog] = {}
+
+
+def _progress_for_store(store: Path) -> DayLog:
+    """this store's day log; only that small file is read, once"""
+    path = PROGRESS.day_log_path(store)
+    with _progress_lock:
+        log = _DAY_LOGS.get(str(path))
+        if log is None:
+            log = DayLog(_live_json(path), store_key(store))
+            _DAY_LOGS[str(path)] = log
+        return log
+
+
+def _write_progress(store: Path, log: DayLog):
+    PERSIST.submit(PROGRESS.day_log_path(store), log.doc, lock=_progress_lock)
+
+
+# signal log path -> SignalLog (appends are serialized per file)
+_SIGNAL_LOGS: dict[str, SignalLog] = {}
+
+
+def _signal_log(store: Path) -> SignalLog:
+    path = PROGRESS.signal_log_path(store)
+    with _progress_lock:
+        log = _SIGNAL_LOGS.get(str(path))
+        if log is None:
+            log = _SIGNAL_LOGS[str(path)] = SignalLog(path)
+        return log
 
 
-def _write_progress(store: Path, prof: dict):
-    _ensure_progress()
-    data = _safe_read_json(PROGRESS_PATH) or {}
-    stores = data.setdefault("stores", {})
-    key = str(store.resolve())
-    stores[key] = prof
-    PROGRESS_PATH.write_text(json.dumps(
-        data, ensure_ascii=False, indent=2), encoding="utf-8")
+def _read_session(store: Path):
+    with _progress_lock:
+        doc = _live_json(PROGRESS.session_path(store))
+        return doc.get("state") if doc else None
+
+
+def _write_session(store: Path, state):
+    PERSIST.submit(PROGRESS.session_path(store),
+                   {"store": store_key(store), "state": state}, lock=_progress_lock)
+
+
+# session format v2: word keys + cursor; entry bodies are rehydrated on load
+_SESSION_PATCH_KEYS = ("mode", "groupSize", "groupStart", "stage",
+                       "activeIndex", "seenStates", "weakSet")
+
+
+def _patch_session(store: Path, patch: dict) -> bool:
+    path = PROGRESS.session_path(store)
+    with _progress_lock:
+        doc = _live_json(path)
+        st = doc.get("state") if doc else None
+        if not isinstance(st, dict) or st.get("v") != 2:
+            return False
+        for k in _SESSION_PATCH_KEYS:
+            if k in patch:
+                st[k] = patch[k]
+        PERSIST.submit(path, doc, lock=_progress_lock)
+    return True
+
+
+def _rehydrate_session(store, st: dict) -> dict:
+    """v2 session -> the planner state app.js expects (masterWords/activeWords with entries)"""
+    words = [w for w in st.get("words") or [] if isinstance(w, str)]
+    active = [w for w in st.get("active") or [] if isinstance(w, str)]
+    bodies = {}
+    for w in dict.fromkeys(words + active):
+        e = store.get(w)
+        if e:
+            bodies[w] = e.get("entry") if isinstance(e.get("entry"), dict) else e
+    out = {k: v for k, v in st.items() if k not in ("words", "active")}
+    out["masterWords"] = [{"word": w, "entry": bodies.get(w)} for w in words]
+    out["activeWords"] = [{"word": w, "entry": bodies.get(w)} for w in active]
+    return out
 
 
 def _today_key():
@@ -85,28 +160,24 @@ def _today_key():
 
 # ---- settings: remember last store & recent list ----
 def _get_settings() -> dict:
-    _ensure_progress()
-    data = _safe_read_json(PROGRESS_PATH) or {}
-    return data.setdefault("settings", {})
+    with _progress_lock:
+        return _live_json(PROGRESS.settings_path) or {}
 
 
 def _write_settings(settings: dict):
-    _ensure_progress()
-    data = _safe_read_json(PROGRESS_PATH) or {}
-    data["settings"] = settings or {}
-    PROGRESS_PATH.write_text(json.dumps(
-        data, ensure_ascii=False, indent=2), encoding="utf-8")
+    PERSIST.submit(PROGRESS.settings_path, settings or {}, lock=_progress_lock)
 
 
 def _remember_store(path: Path, max_keep: int = 10):
-    settings = _get_settings()
-    p = str(path.resolve())
-    recent = settings.get("recent_stores") or []
-    recent = [x for x in recent if x != p]
-    recent.insert(0, p)
-    settings["recent_stores"] = recent[:max_keep]
-    settings["last_store"] = p
-    _write_settings(settings)
+    with _progress_lock:
+        settings = _get_settings()
+        p = str(path.resolve())
+        recent = settings.get("recent_stores") or []
+        recent = [x for x in recent if x != p]
+        recent.insert(0, p)
+        settings["recent_stores"] = recent[:max_keep]
+        settings["last_store"] = p
+        _write_settings(settings)
 
 
 def _recent_stores() -> list[str]:
@@ -124,19 +195,12 @@ def _last_store_path() -> Path | None:
 
 
 def _ever_learned_words(store: Path) -> set[str]:
-    """Union of words ever recorded as learned in progress.json."""
-    prof = _progress_for_store(store)
-    days = prof.get("days", {}) or {}
-    out = set()
-    for rec in days.values():
-        for w in rec.get("words", []) or []:
-            out.add(w)
-    return out
+    """Every word ever recorded as learned for this store (maintained set; do not mutate)."""
+    return _progress_for_store(store).ever
 
 
 def _today_learned_set(store: Path) -> set[str]:
-    prof = _progress_for_store(store)
-    return set(prof.get("days", {}).get(_today_key(), {}).get("words", []) or [])
+    return _progress_for_store(store).day_set(_today_key())
 
 
 def _safe_float(x, default=0.0):
@@ -164,13 +228,203 @@ def _stable_hash(val: str) -> int:
     return int(hashlib.sha1(val.encode("utf-8")).hexdigest(), 16)
 
 
+def _plan_fields(e):
+    """(word, entry body, review_count, avg_score) of a store entry, None without a word"""
+    ent = e.get("entry") if isinstance(e, dict) else None
+    if ent is None:
+        ent = e if isinstance(e, dict) else {}
+    w = (e.get("word") if isinstance(e, dict) else None) or ent.get("word")
+    if not w:
+        return None
+    srs = e.get("srs") or ent.get("srs") or {}
+    rc = _safe_int(srs.get("review_count", srs.get("n", 0)), 0)
+    avg = _safe_float(srs.get("avg_score", srs.get("score", 1.0)), 1.0)
+    return w, ent, rc, avg
+
+
+# plan file path -> {"seed", "fp", "fresh", "supplement"} of the current day
+_DAILY_ORDERS: dict[str, dict] = {}
+
+
+def _words_fingerprint(entries: list) -> str:
+    """hash of the store's word sequence: any add / delete / reorder / rename changes it"""
+    h = hashlib.sha1()
+    for e in entries:
+        h.update(((entry_word(e) if isinstance(e, dict) else None) or "").encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+def _build_daily_order(store: Path, entries: list, seed_str: str, fp: str) -> dict:
+    """
+    the day's stable shuffle: entry positions ordered by the fresh-word hash,
+    and each position's rank under the supplement hash (-1 without a word)
+    """
+    fresh, supp = [], []
+    for i, e in enumerate(entries):
+        f = _plan_fields(e)
+        if f:
+            fresh.append((_stable_hash(f[0] + "|" + seed_str), i))
+            supp.append((_stable_hash("S|" + f[0] + "|" + seed_str), i))
+    fresh.sort()
+    supp.sort()
+    rank = [-1] * len(entries)
+    for r, (_, i) in enumerate(supp):
+        rank[i] = r
+    return {"store": store_key(store), "seed": seed_str, "fp": fp,
+            "fresh": [i for _, i in fresh], "supplement": rank}
+
+
+def _daily_order(store: Path, entries: list, seed_str: str) -> dict:
+    """
+    cached per (store, day); the positions are only reused while the store's
+    word sequence is unchanged (fingerprint), otherwise rebuilt
+    """
+    path = PROGRESS.plan_path(store)
+    fp = _words_fingerprint(entries)
+    with _progress_lock:
+        doc = _DAILY_ORDERS.get(str(path))
+        if doc is None or doc.get("seed") != seed_str or doc.get("fp") != fp:
+            doc = _live_json(path)
+            if (not doc or doc.get("seed") != seed_str or doc.get("fp") != fp
+                    or not isinstance(doc.get("fresh"), list)
+                    or len(doc.get("supplement") or []) != len(entries)):
+                doc = _build_daily_order(store, entries, seed_str, fp)
+                PERSIST.submit(path, doc, lock=_progress_lock)
+            _DAILY_ORDERS[str(path)] = doc
+        return doc
+
+
+def _apply_score(srs: dict, value: float, ts) -> dict:
+    """running average of outcomes (update_score semantics) on a copy of srs"""
+    srs = dict(srs or {})
+    n = _safe_int(srs.get("review_count", srs.get("n", 0)), 0)
+    avg = _safe_float(srs.get("avg_score", srs.get("score", 0.5)), 0.5)
+    new_n = n + 1
+    new_avg = (avg * n + _safe_float(value, 0.0)) / max(1, new_n)
+    srs["review_count"] = new_n
+    srs["avg_score"] = new_avg
+    srs["last_ts"] = ts
+    return srs
+
+
+def _note_learned(log: DayLog, word: str) -> tuple[bool, int]:
+    """record `word` under today's day log; returns (changed, today_count)"""
+    day = _today_key()
+    changed = log.note(word, day)
+    return changed, len(log.day_set(day))
+
+
+def _snapshot_counts(store: Path) -> tuple[int, int, int]:
+    """(total, learned, mastered) from the store's running counters (no scan)"""
+    try:
+        st = open_store(store).stats()
+    except Exception:
+        return 0, 0, 0
+    return st.total, st.learned, st.mastered
+
+
+# ---------- study queues (precomputed in the background, see gui_web/precompute) ----------
+def _plan_daily_new(store: Path, k: int = 100) -> dict:
+    """
+    选择“新词”为主：review_count == 0 且从未在进度记录（progress/<store_id>.json）里出现过，
+    并且排除今天已经学习过的词。使用“按天稳定的乱序”让每天不同但当天多次一致。
+    若新词不足，按 (avg_score升序, review_count升序) 进行补充。
+    """
+    raw = _read_store(store)
+    entries = raw.get("entries") or raw.get("words") or []
+
+    # 构建集合
+    ever = _ever_learned_words(store)
+    today_set = _today_learned_set(store)
+    # 稳定种子（同一天固定、不同天变化；与具体词库绑定）。
+    # 每个词的位置只取决于它自己的 hash，词库增删词不会打乱其余词的相对顺序
+    seed_str = f"{_today_key()}|{str(store.resolve())}"
+
+    # 当天的乱序只算一次（内存 + progress/<store_id>.plan.json），重复点击/恢复直接复用
+    order = _daily_order(store, entries, seed_str)
+
+    # 新词候选：沿当天乱序取前 k 个符合条件的词
+    picked = []
+    for i in order["fresh"]:
+        if len(picked) >= k:
+            break
+        f = _plan_fields(entries[i])
+        if f and f[2] == 0 and (f[0] not in ever) and (f[0] not in today_set):
+            picked.append({"word": f[0], "entry": f[1]})
+
+    # 若不够，补充“弱项/低复习次数”，排除今天已学
+    if len(picked) < k:
+        remain = k - len(picked)
+        picked_words = {x["word"] for x in picked}
+        rank = order["supplement"]
+
+        def candidates():
+            for i, e in enumerate(entries):
+                f = _plan_fields(e)
+                if f and f[0] not in today_set and f[0] not in picked_words:
+                    w, ent, rc, avg = f
+                    yield avg, rc, rank[i], w, ent
+
+        supplement = heapq.nsmallest(remain, candidates(),
+                                     key=lambda t: (t[0], t[1], t[2]))
+        picked.extend([{"word": w, "entry": ent}
+                      for _, _, _, w, ent in supplement])
+
+    return {"ok": True, "items": picked}
+
+
+def _sample_by_score(store: Path, k: int = 100, learned_only: bool = True) -> dict:
+    """
+    Review-by-score: 默认只抽“已学/已复习”的词（learned_only=True）。
+    已学判定：srs.review_count > 0 或在进度记录的 days[*].words 出现过。
+    """
+    raw = _read_store(store)
+    entries = raw.get("entries") or raw.get("words") or []
+    ever = _ever_learned_words(store) if learned_only else set()
+
+    def candidates():
+        for e in entries:
+            ent = e.get("entry") or e
+            w = ent.get("word")
+            if not w:
+                continue
+            srs = e.get("srs") or ent.get("srs") or {}
+            avg = _safe_float(srs.get("avg_score", srs.get("score", 1.0)), 1.0)
+            n = _safe_int(srs.get("review_count", srs.get("n", 0)), 0)
+
+            if learned_only and n <= 0 and (w not in ever):
+                continue
+
+            yield {"word": w, "entry": ent, "score": avg, "n": n}
+
+    # 有界堆取前 k 个，同分时保持词库顺序（与稳定排序一致）
+    items = heapq.nsmallest(k, candidates(),
+                            key=lambda x: (x["score"], x["n"]))
+    return {"ok": True, "items": [{"word": it["word"], "entry": it["entry"]} for it in items]}
+
+
+def _sample_study_items(store: Path, k: int = 20, min_days_gap: float = 1.0) -> dict:
+    return apply_tool("sample_study_items", {"k": k, "min_days_gap": min_days_gap}, store)
+
+
+PRECOMPUTE = Precomputer(PRECOMPUTE_IDLE_MS / 1000.0)
+PRECOMPUTE.register("plan_daily_new", _plan_daily_new, (100,))
+PRECOMPUTE.register("sample_by_score", _sample_by_score, (100, True))
+# due status moves with the clock: keep the due queue at most a minute old
+PRECOMPUTE.register("sample_study_items", _sample_study_items, (20, 1.0), max_age=60.0)
+
+
 # ---------- API bridge ----------
 class ApiBridge:
     def __init__(self):
+        # one-time split of a legacy data/progress.json
+        PROGRESS.migrate_legacy()
         # load last store if remembered
         last = _last_store_path()
         self.store_path = last if last else DEFAULT_STORE
         _ensure_store(self.store_path)
+        PRECOMPUTE.warm(self.store_path)
 
         self.chat = [{
             "role": "system",
@@ -186,6 +440,8 @@ class ApiBridge:
             self.client = None
 
         self.model = MODEL_NAME or "gpt-5-chat"
+        # open (not yet finalized) learning signals of this session, bounded LRU
+        self.signals = SignalTracker()
 
     # ---------- 文件对话框 ----------
     def open_store_dialog(self, mode: str = "open"):
@@ -195,7 +451,7 @@ class ApiBridge:
                 return {"ok": False, "error": "window not ready"}
             dlg = webview.OPEN_DIALOG if mode == "open" else webview.SAVE_DIALOG
             files = w.create_file_dialog(dlg, allow_multiple=False, file_types=(
-                'JSON files (*.json)', 'All files (*.*)'))
+                'JSON files (*.json)', 'SQLite stores (*.sqlite;*.db)', 'All files (*.*)'))
             if not files:
                 return {"ok": False, "error": "cancelled"}
             path = Path(files if isinstance(files, str) else files[0])
@@ -203,14 +459,16 @@ class ApiBridge:
                 if not path.exists():
                     return {"ok": False, "error": f"file not found: {path}"}
             else:
-                if not path.suffix.lower().endswith(".json"):
+                if not (path.suffix.lower().endswith(".json") or is_sqlite_path(path)):
                     path = path.with_suffix(".json")
-                if not path.exists():
-                    path.write_text(json.dumps(
-                        {"entries": []}, ensure_ascii=False, indent=2), encoding="utf-8")
+            flush_store(self.store_path)
+            PERSIST.flush()
             self.store_path = path
+            # open signals belong to the previous store (still recoverable from its log)
+            self.signals = SignalTracker()
             _ensure_store(self.store_path)
             _remember_store(self.store_path)
+            PRECOMPUTE.warm(self.store_path)
             return {"ok": True, "path": str(self.store_path)}
         except Exception as e:
             return {"ok": False, "error": str(e)}
@@ -224,9 +482,14 @@ class ApiBridge:
             p = Path(path)
             if not p.exists():
                 return {"ok": False, "error": f"file not found: {path}"}
+            flush_store(self.store_path)
+            PERSIST.flush()
             self.store_path = p
+            # open signals belong to the previous store (still recoverable from its log)
+            self.signals = SignalTracker()
             _ensure_store(self.store_path)
             _remember_store(self.store_path)
+            PRECOMPUTE.warm(self.store_path)
             return {"ok": True, "path": str(self.store_path)}
         except Exception as e:
             return {"ok": False, "error": str(e)}
@@ -234,6 +497,11 @@ class ApiBridge:
     def get_current_store_path(self):
         return {"ok": True, "path": str(self.store_path)}
 
+    def cache_stats(self):
+        """store cache, progress writer and precompute counters (for profiling round trips)"""
+        return {"ok": True, **STORE_CACHE.stats(), "persist": PERSIST.stats(),
+                "precompute": PRECOMPUTE.stats()}
+
     # ---------- Chat（保持你的原逻辑） ----------
     def send_message(self, text: str) -> dict:
         with _lock:
@@ -305,7 +573,12 @@ class ApiBridge:
                     except Exception:
                         args = {}
 
-                    r = apply_tool(name, args, self.store_path)
+                    if name == "record_signal_tool":
+                        r = self.record_signals([args])
+                    else:
+                        r = apply_tool(name, args, self.store_path)
+                    if name == "commit_review":
+                        PRECOMPUTE.invalidate(self.store_path)
                     logs.append({"tool": name, "args": args,
                                 "result": redact_for_log(r)})
 
@@ -335,208 +608,176 @@ class ApiBridge:
 
     # ---------- 前端直连工具 ----------
     def record_signal_tool(self, word: str, signal: str, note: str = ""):
-        return apply_tool("record_signal_tool", {"word": word, "signal": signal, "note": note}, self.store_path)
+        return self.record_signals([{"word": word, "signal": signal, "note": note}])
+
+    def record_signals(self, events: list | None):
+        """
+        batched learning signals from the front end: [{"word", "signal", "note"?, "ts"?}, ...].
+        Kept per word until finalize_card and appended to the store's signal log.
+        """
+        events = [ev for ev in events or [] if isinstance(ev, dict)
+                  and isinstance(ev.get("word"), str) and ev.get("signal")]
+        for ev in events:
+            self.signals.record(ev["word"], str(ev["signal"]), ev.get("note") or None)
+        try:
+            n = _signal_log(self.store_path).append(events) if events else 0
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+        return {"ok": True, "count": n}
 
     def commit_review(self, word: str, outcome: float | None = None):
-        return apply_tool("commit_review", {"word": word, "override_score": outcome}, self.store_path)
+        r = apply_tool("commit_review", {"word": word, "override_score": outcome}, self.store_path)
+        PRECOMPUTE.invalidate(self.store_path)
+        return r
 
     def sample_study_items(self, k: int = 20, min_days_gap: float = 1.0):
-        return apply_tool("sample_study_items", {"k": _safe_int(k, 20), "min_days_gap": _safe_float(min_days_gap, 1.0)}, self.store_path)
+        return PRECOMPUTE.get(self.store_path, "sample_study_items",
+                              (_safe_int(k, 20), _safe_float(min_days_gap, 1.0)))
 
     def get_word(self, word: str):
         return apply_tool("get_word", {"word": word}, self.store_path)
 
     # ---- FIXED: plan_daily_new chooses NEW words with per-day stable shuffle
     def plan_daily_new(self, k: int = 100):
-        """
-        选择“新词”为主：review_count == 0 且从未在 progress.json 里出现过，
-        并且排除今天已经学习过的词。使用“按天稳定的乱序”让每天不同但当天多次一致。
-        若新词不足，按 (avg_score升序, review_count升序) 进行补充。
-        """
-        k = _safe_int(k, 100)
-        raw = _safe_read_json(self.store_path) or {}
-        entries = raw.get("entries") or raw.get("words") or []
-
-        # 构建集合
-        ever = _ever_learned_words(self.store_path)
-        today_set = _today_learned_set(self.store_path)
-        # 稳定种子（同一天固定、不同天变化；与具体词库绑定）
-        seed_str = f"{_today_key()}|{str(self.store_path.resolve())}|{len(entries)}"
-
-        def entry_iter():
-            for e in entries:
-                ent = e.get("entry") if isinstance(e, dict) else None
-                if ent is None:
-                    ent = e if isinstance(e, dict) else {}
-                w = (e.get("word") if isinstance(e, dict)
-                     else None) or ent.get("word")
-                if not w:
-                    continue
-                srs = e.get("srs") or ent.get("srs") or {}
-                rc = _safe_int(srs.get("review_count", srs.get("n", 0)), 0)
-                avg = _safe_float(
-                    srs.get("avg_score", srs.get("score", 1.0)), 1.0)
-                yield w, ent, rc, avg
-
-        # 新词候选
-        fresh = []
-        for w, ent, rc, avg in entry_iter():
-            if rc == 0 and (w not in ever) and (w not in today_set):
-                h = _stable_hash(w + "|" + seed_str)
-                fresh.append((h, w, ent))
-
-        fresh.sort(key=lambda t: t[0])
-        picked = [{"word": w, "entry": ent} for _, w, ent in fresh[:k]]
-
-        # 若不够，补充“弱项/低复习次数”，排除今天已学
-        if len(picked) < k:
-            remain = k - len(picked)
-            supplement = []
-            for w, ent, rc, avg in entry_iter():
-                if w in today_set:
-                    continue
-                if any(x["word"] == w for x in picked):
-                    continue
-                h = _stable_hash("S|" + w + "|" + seed_str)
-                supplement.append((avg, rc, h, w, ent))
-            supplement.sort(key=lambda t: (t[0], t[1], t[2]))
-            picked.extend([{"word": w, "entry": ent}
-                          for _, _, _, w, ent in supplement[:remain]])
-
-        return {"ok": True, "items": picked}
+        """按天稳定乱序的新词计划（见 _plan_daily_new）；通常直接返回后台预计算的结果"""
+        return PRECOMPUTE.get(self.store_path, "plan_daily_new", (_safe_int(k, 100),))
 
     def sample_by_priority(self, k: int = 100):
         return apply_tool("sample_by_priority", {"k": _safe_int(k, 100)}, self.store_path)
 
     def sample_by_score(self, k: int = 100, learned_only: bool = True):
-        """
-        Review-by-score: 默认只抽“已学/已复习”的词（learned_only=True）。
-        已学判定：srs.review_count > 0 或在 progress.json 的 days[*].words 出现过。
-        """
-        raw = _safe_read_json(self.store_path) or {}
-        entries = raw.get("entries") or raw.get("words") or []
-        ever = _ever_learned_words(self.store_path) if learned_only else set()
-
-        items = []
-        for e in entries:
-            ent = e.get("entry") or e
-            w = ent.get("word")
-            if not w:
-                continue
-            srs = e.get("srs") or ent.get("srs") or {}
-            avg = _safe_float(srs.get("avg_score", srs.get("score", 1.0)), 1.0)
-            n = _safe_int(srs.get("review_count", srs.get("n", 0)), 0)
-
-            if learned_only and n <= 0 and (w not in ever):
-                continue
-
-            items.append({"word": w, "entry": ent, "score": avg, "n": n})
-
-        items.sort(key=lambda x: (x["score"], x["n"]))
-        items = items[:max(1, _safe_int(k, 100))]
-        return {"ok": True, "items": [{"word": it["word"], "entry": it["entry"]} for it in items]}
+        """Review-by-score（见 _sample_by_score）；通常直接返回后台预计算的结果"""
+        return PRECOMPUTE.get(self.store_path, "sample_by_score",
+                              (max(1, _safe_int(k, 100)), bool(learned_only)))
 
     def update_score(self, word: str, value: float):
-        raw = _safe_read_json(self.store_path) or {"entries": []}
-        entries = raw.get("entries") or raw.get("words") or []
-        updated = False
+        store = open_store(self.store_path)
+        e = store.get(word, exact=True)
+        if not e:
+            return {"ok": False}
+        ent = e.get("entry") or e
         now_ts = datetime.datetime.utcnow().isoformat()
+        srs = _apply_score(e.get("srs") or ent.get("srs") or {}, value, now_ts)
+        # single-entry write (one row for SQLite stores)
+        ok = store.update_srs(word, srs, outcome=_safe_float(value, 0.0))
+        PRECOMPUTE.invalidate(self.store_path)
+        return {"ok": ok}
 
-        for e in entries:
-            ent = e.get("entry") or e
-            w = ent.get("word")
-            if w != word:
-                continue
-            srs = e.get("srs") or ent.get("srs") or {}
-            n = _safe_int(srs.get("review_count", srs.get("n", 0)), 0)
-            avg = _safe_float(srs.get("avg_score", srs.get("score", 0.5)), 0.5)
-            new_n = n + 1
-            new_avg = (avg * n + _safe_float(value, 0.0)) / max(1, new_n)
-            srs["review_count"] = new_n
-            srs["avg_score"] = new_avg
-            srs["last_ts"] = now_ts
-            if "srs" in e:
-                e["srs"] = srs
-            else:
-                ent["srs"] = srs
-                if "entry" in e:
-                    e["entry"] = ent
-            updated = True
-            break
-
-        if updated:
-            raw["entries"] = entries
-            self.store_path.write_text(json.dumps(
-                raw, ensure_ascii=False, indent=2), encoding="utf-8")
-        return {"ok": updated}
+    def finalize_card(self, word: str, outcome: float | None, signals: list | None = None):
+        """
+        一张卡结束时的合并调用，等价于依次调用
+        record_signals → note_learn_event → commit_review → update_score → progress_snapshot，
+        但只读一次词库、写一次 SRS、写一次 progress。
+        signals: 尚未发送的信号 [{"signal": "verify", "note": "verified_correct"}, ...]（word 缺省为本卡）
+        本卡的信号（本会话内存中的，或从信号日志末尾恢复的）结算为 signal_score；
+        outcome 为空时用它作为本次结果。
+        """
+        batch = []
+        for sig in signals or []:
+            if isinstance(sig, str):
+                sig = {"signal": sig}
+            if isinstance(sig, dict):
+                batch.append({"word": word, **sig})
+        if batch:
+            self.record_signals(batch)
+
+        store = open_store(self.store_path)
+        e = store.get(word, exact=True)
+        if not e:
+            return {"ok": False, "error": f"word not found: {word}"}
+        sig_log = _signal_log(self.store_path)
+        events = self.signals.pop(word)
+        if events is None:
+            events = sig_log.open_events(word)
+        signal_score = compute_score(word, events=events)
+        value = signal_score if outcome is None else _safe_float(outcome, 0.0)
+
+        # commit_review + update_score on the same srs block, one write
+        s = commit(ensure_state(e.get("srs") or e.get("review") or {}), outcome=value)
+        s = _apply_score(s, value, s["last_ts"])
+        store.update_srs(entry_word(e), s, outcome=value)
+        try:
+            sig_log.finalize(word, signal_score)
+        except Exception as ex:
+            print(f"[signals] finalize log failed: {ex}")
+
+        with _progress_lock:
+            log = _progress_for_store(self.store_path)
+            changed, today_cnt = _note_learned(log, word)
+            if changed:
+                _write_progress(self.store_path, log)
+        # queues are rebuilt in the background once the user pauses
+        PRECOMPUTE.invalidate(self.store_path)
+
+        total, learned, mastered = _snapshot_counts(self.store_path)
+        return {"ok": True, "srs": s, "today": today_cnt, "signal_score": signal_score,
+                "snapshot": {"total": total, "learned": learned, "mastered": mastered,
+                             "today_learned": today_cnt}}
 
     # ---------- 会话持久化 ----------
+    # progress writes are queued on PERSIST; these return without disk I/O
     def save_session_state(self, state: dict | None):
-        prof = _progress_for_store(self.store_path)
-        prof["last_session"] = state
-        _write_progress(self.store_path, prof)
+        """full snapshot; app.js sends v2 (word keys only) when the word lists change"""
+        _write_session(self.store_path, state)
+        return {"ok": True}
+
+    def patch_session_state(self, patch: dict | None):
+        """merge the changed cursor fields into the saved v2 session"""
+        if not isinstance(patch, dict):
+            return {"ok": False, "error": "bad patch"}
+        if not _patch_session(self.store_path, patch):
+            return {"ok": False, "error": "no session to patch"}
         return {"ok": True}
 
     def load_session_state(self):
-        prof = _progress_for_store(self.store_path)
-        return {"ok": True, "state": prof.get("last_session")}
+        st = _read_session(self.store_path)
+        if isinstance(st, dict) and st.get("v") == 2:
+            st = _rehydrate_session(open_store(self.store_path), st)
+        return {"ok": True, "state": st}
 
     def clear_session_state(self):
-        prof = _progress_for_store(self.store_path)
-        prof["last_session"] = None
-        _write_progress(self.store_path, prof)
+        _write_session(self.store_path, None)
         return {"ok": True}
 
     def note_learn_event(self, word: str):
-        prof = _progress_for_store(self.store_path)
-        days = prof.setdefault("days", {})
-        today = _today_key()
-        drec = days.setdefault(today, {"words": []})
-        if word not in drec["words"]:
-            drec["words"].append(word)
-            _write_progress(self.store_path, prof)
-        return {"ok": True, "today": len(set(drec["words"]))}
+        with _progress_lock:
+            log = _progress_for_store(self.store_path)
+            changed, today_cnt = _note_learned(log, word)
+            if changed:
+                _write_progress(self.store_path, log)
+        if changed:
+            PRECOMPUTE.invalidate(self.store_path)
+        return {"ok": True, "today": today_cnt}
 
     def sample_today_all(self):
-        prof = _progress_for_store(self.store_path)
-        words = list(dict.fromkeys(prof.get("days", {}).get(
-            _today_key(), {}).get("words", [])))
+        with _progress_lock:
+            words = _progress_for_store(self.store_path).day_words(_today_key())
         if not words:
             return {"ok": True, "items": []}
-        raw = _safe_read_json(self.store_path) or {}
+        wanted = set(words)
+        raw = _read_store(self.store_path)
         entries = raw.get("entries") or raw.get("words") or []
         out = []
         for e in entries:
             ent = e.get("entry") or e
             w = (e.get("word") if isinstance(e, dict)
                  else None) or ent.get("word")
-            if w in words:
+            if w in wanted:
                 out.append({"word": w, "entry": ent})
         return {"ok": True, "items": out}
 
     def progress_snapshot(self):
-        raw = _safe_read_json(self.store_path) or {}
-        entries = raw.get("entries") or raw.get("words") or []
-        total = len(entries)
-        learned = 0
-        mastered = 0
-        for e in entries:
-            srs = e.get("srs") or e.get("review") or {}
-            rc = _safe_int(srs.get("review_count") or srs.get(
-                "n") or srs.get("reviews") or 0, 0)
-            if rc > 0:
-                learned += 1
-                last_score = _safe_float(
-                    srs.get("avg_score", srs.get("score", 0.5)), 0.5)
-                interval = _safe_float(
-                    srs.get("interval_days", srs.get("interval", 0.0)), 0.0)
-                if rc >= 3 and (last_score >= 0.6 or interval >= 3.0):
-                    mastered += 1
-        prof = _progress_for_store(self.store_path)
-        today_cnt = len(set(prof.get("days", {}).get(
-            _today_key(), {}).get("words", [])))
+        total, learned, mastered = _snapshot_counts(self.store_path)
+        today_cnt = len(_today_learned_set(self.store_path))
         return {"ok": True, "total": total, "learned": learned, "mastered": mastered, "today_learned": today_cnt}
 
+    def recompute_stats(self):
+        """maintenance: check the running counters against a full scan (and repair them)"""
+        try:
+            return {"ok": True, **open_store(self.store_path).recompute_stats()}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
 
 def run():
     index_path = (WEB_DIR / "index.html")
@@ -548,10 +789,17 @@ def run():
         js_api=ApiBridge(),
         width=1320, height=880, resizable=True
     )
+    # flush debounced progress writes before the window goes away
+    window.events.closing += lambda: PERSIST.flush()
     try:
         webview.start(debug=True, gui="edgechromium")
     except Exception:
         webview.start(debug=True)
+    finally:
+        PRECOMPUTE.close()
+        PERSIST.close()
+        # fold review journals back into the store files
+        close_all()
 
 
 if __name__ == "__main__":
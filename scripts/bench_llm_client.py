@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_llm_client.py
+对比“每次调用新建客户端”（旧 setup_client 的做法）与共享连接池客户端（api_client.get_client）
+的单请求开销。服务端是本机的 stub（模拟 /chat/completions，立即返回固定 JSON），
+所以测到的是纯客户端开销：构造 OpenAI/httpx 对象 + 建连；真实 API 还要再加 TLS 握手，差距只会更大。
+
+用法：
+  python scripts/bench_llm_client.py --n 200
+  python scripts/bench_llm_client.py --n 400 --workers 8
+
+说明：
+  不访问外网，不读写 data/；stub 端统计实际建立的 TCP 连接数。
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx  # noqa: E402
+from openai import OpenAI  # noqa: E402
+
+import api_client  # noqa: E402
+from config import DEFAULT_TIMEOUT  # noqa: E402
+
+_REPLY = json.dumps({
+    "id": "stub", "object": "chat.completion", "created": 0, "model": "stub",
+    "choices": [{"index": 0, "finish_reason": "stop",
+                 "message": {"role": "assistant", "content": "{\"word\": \"stub\"}"}}],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}).encode("utf-8")
+
+
+class _Stub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    # 头和正文一次发出，避免 Nagle + 延迟 ACK 给每个请求加 ~40ms
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+    connections = 0
+    _lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with _Stub._lock:
+            _Stub.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(_REPLY)))
+        self.end_headers()
+        self.wfile.write(_REPLY)
+
+    def log_message(self, *args):
+        pass
+
+
+def _legacy_client(base_url: str) -> OpenAI:
+    # 旧 setup_client：每次一个新的 httpx.Client + OpenAI
+    http_client = httpx.Client(http2=False, proxy=None, timeout=DEFAULT_TIMEOUT)
+    return OpenAI(api_key="stub", base_url=base_url, http_client=http_client)
+
+
+def _call(client: OpenAI):
+    resp = client.chat.completions.create(
+        model="stub", messages=[{"role": "user", "content": "hi"}])
+    assert resp.choices[0].message.content
+
+
+def run(label: str, get, n: int, workers: int):
+    _Stub.connections = 0
+    t0 = time.perf_counter()
+    if workers <= 1:
+        for _ in range(n):
+            _call(get())
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            list(ex.map(lambda _: _call(get()), range(n)))
+    dt = time.perf_counter() - t0
+    print(f"{label:<10} {n} req  workers={workers}  {dt * 1000 / n:7.3f} ms/req  "
+          f"{n / dt:8.1f} req/s  tcp connections={_Stub.connections}")
+    return dt
+
+
+def main():
+    ap = argparse.ArgumentParser(description="per-call vs pooled LLM client overhead")
+    ap.add_argument("--n", type=int, default=200)
+    ap.add_argument("--workers", type=int, default=1)
+    args = ap.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    # 共享客户端指向 stub
+    api_client.BASE_URL = base_url
+    api_client.API_KEY = "stub"
+    api_client.close_client()
+    api_client.ensure_pool_size(args.workers)
+
+    # 预热（import / 首次建池不计入）
+    _call(_legacy_client(base_url))
+    _call(api_client.get_client())
+
+    old = run("per-call", lambda: _legacy_client(base_url), args.n, args.workers)
+    new = run("pooled", api_client.get_client, args.n, args.workers)
+    print(f"speedup x{old / new:.1f}")
+
+    api_client.close_client()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_sampling.py
+对比标量抽样（study.sampler）与列式批量抽样（study.srs_table）、
+到期索引（study.due_index）在大词库上的耗时，并检查返回的词是否逐项一致；
+另外给出 Tk 版使用的加权无放回抽样 / 防重复过滤的耗时。
+
+用法：
+  python scripts/bench_sampling.py --n 500000 --k 100
+  python scripts/bench_sampling.py --n 50000 --repeat 10 --seed 1
+
+说明：
+  词库为随机合成数据（不读写 data/）；计时不含建表（建表每次加载只做一次）。
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from study import sampler, srs_table, due_index  # noqa: E402
+import study.srs as srs  # noqa: E402
+
+
+def make_entries(n: int, seed: int, tnow: float):
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        e = {"word": f"w{i}"}
+        if rnd.random() < 0.7:
+            last = tnow - rnd.uniform(0, 30) * 86400
+            e["srs"] = {
+                "review_count": rnd.randint(0, 5),
+                "last_ts": last,
+                "next_due_ts": last + rnd.uniform(0, 20) * 86400,
+                "score": rnd.random(),
+            }
+        out.append(e)
+    return out
+
+
+def timed(fn, repeat: int):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        res = fn()
+    return res, (time.perf_counter() - t0) / repeat * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description="scalar vs columnar SRS sampling")
+    ap.add_argument("--n", type=int, default=500000)
+    ap.add_argument("--k", type=int, default=100)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    if not srs_table.available():
+        sys.exit("numpy is not installed")
+
+    # 固定“现在”，两边按同一时刻计算 priority
+    tnow = srs.now_ts()
+    srs.now_ts = sampler.now_ts = srs_table.now_ts = due_index.now_ts = lambda: tnow
+    entries = make_entries(args.n, args.seed, tnow)
+    t0 = time.perf_counter()
+    table = srs_table.SRSTable.from_entries(entries)
+    print(f"build table: {(time.perf_counter() - t0) * 1000:.1f} ms ({table.n} rows)")
+    t0 = time.perf_counter()
+    index = due_index.DueIndex(entries)
+    print(f"build due index: {(time.perf_counter() - t0) * 1000:.1f} ms "
+          f"({index.due_count(tnow)} due now)")
+
+    cases = (
+        ("sample_study_items",
+         lambda: sampler.sample_study_items(entries, k=args.k),
+         lambda: srs_table.sample_study_items_batch(table, k=args.k, now=tnow)),
+        ("plan_daily_new",
+         lambda: sampler.plan_daily_new(entries, k=args.k),
+         lambda: srs_table.plan_daily_new_batch(table, k=args.k)),
+        ("sample_by_priority",
+         lambda: sampler.sample_by_priority(entries, k=args.k),
+         lambda: srs_table.sample_by_priority_batch(table, k=args.k, now=tnow)),
+    )
+    for name, scalar, batch in cases:
+        a, ta = timed(scalar, args.repeat)
+        b, tb = timed(batch, args.repeat)
+        same = [x["word"] for x in a] == [entries[int(table.pos[r])]["word"] for r in b]
+        print(f"{name:20s} scalar {ta:9.1f} ms   batch {tb:7.1f} ms   "
+              f"x{ta / max(tb, 1e-9):6.1f}   same={same}")
+        if name == "sample_study_items":
+            c, tc = timed(lambda: index.sample_study_items(k=args.k, now=tnow), args.repeat)
+            same = [x["word"] for x in a] == [entries[p]["word"] for p in c]
+            print(f"{'  (due index)':20s} scalar {ta:9.1f} ms   index {tc:7.1f} ms   "
+                  f"x{ta / max(tc, 1e-9):6.1f}   same={same}")
+
+    # 加权无放回抽样（Efraimidis–Spirakis）与防重复过滤
+    print("-------------------")
+    _, t = timed(lambda: sampler.weighted_sample_without_replacement(
+        entries, args.k, seed=args.seed, now=tnow), args.repeat)
+    print(f"{'weighted ES':20s} {t:9.1f} ms")
+    _, t = timed(lambda: sampler.anti_repeat_filter(entries, 1.0, now=tnow), args.repeat)
+    print(f"{'anti-repeat scan':20s} {t:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,9 +11,15 @@ Usage examples:
 import argparse
 import datetime
 import json
+import sys
 from pathlib import Path
 from typing import Dict, List, Optional
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils.word_index import WordIndex  # noqa: E402
+from gui_web.progress_files import ProgressLayout  # noqa: E402
+from gui_web.store_backend import open_store  # noqa: E402
+
 # ---------- PDF libs ----------
 try:
     from reportlab.lib import pagesizes, colors
@@ -120,28 +126,33 @@ def _collect_words_for_day(progress_obj: dict, store_path: Path, day: str) -> Li
     return out
 
 
-def _entries_by_word(store_obj: dict) -> Dict[str, dict]:
+class _EntryMap:
+    """word -> entry 映射，带 O(1) 的大小写/复数兜底查询"""
+
+    def __init__(self, words: List[str], ents: List[dict]):
+        self.ents = ents
+        self.index = WordIndex(words, word_of=lambda w: w)
+
+
+def _entries_by_word(store_obj: dict) -> _EntryMap:
     entries = (store_obj or {}).get("entries") or (
         store_obj or {}).get("words") or []
-    m: Dict[str, dict] = {}
+    words: List[str] = []
+    ents: List[dict] = []
     for e in entries:
         ent = e.get("entry") if isinstance(e, dict) else None
         if ent is None:
             ent = e if isinstance(e, dict) else {}
         w = (e.get("word") if isinstance(e, dict) else None) or ent.get("word")
         if w:
-            m[str(w)] = ent
-    return m
+            words.append(str(w))
+            ents.append(ent)
+    return _EntryMap(words, ents)
 
 
-def _pick_entry(word: str, mapping: Dict[str, dict]) -> Optional[dict]:
-    if word in mapping:
-        return mapping[word]
-    lw = word.lower()
-    for k, v in mapping.items():
-        if k.lower() == lw:
-            return v
-    return None
+def _pick_entry(word: str, mapping: _EntryMap) -> Optional[dict]:
+    i = mapping.index.lookup(word)
+    return mapping.ents[i] if i >= 0 else None
 
 # ================= font helpers =================
 
@@ -292,7 +303,7 @@ def make_styles(body_font: str):
 # ================= render =================
 
 
-def render_day_pdf(out_pdf: Path, date_str: str, words: List[str], mapping: Dict[str, dict],
+def render_day_pdf(out_pdf: Path, date_str: str, words: List[str], mapping: _EntryMap,
                    styles, ipa_fonts: List[str], body_font: str):
     out_pdf.parent.mkdir(parents=True, exist_ok=True)
     doc = SimpleDocTemplate(
@@ -368,7 +379,7 @@ def main():
     parser.add_argument("--root", type=str, default="",
                         help="Project root (dir that contains 'data/').")
     parser.add_argument("--progress", type=str, default="",
-                        help="Path to progress.json (default: <root>/data/progress.json)")
+                        help="Legacy progress.json (default: <root>/data/settings.json + data/progress/)")
     parser.add_argument("--store", type=str, default="",
                         help="Path to store.json (default: progress.settings.last_store or <root>/data/store.json)")
     parser.add_argument("--outdir", type=str, default="",
@@ -384,13 +395,17 @@ def main():
     args = parser.parse_args()
 
     root = _find_project_root(args.root if args.root else None)
-    progress_path = Path(args.progress) if args.progress else (
-        root / "data" / "progress.json")
+    layout = ProgressLayout(root / "data")
+    progress_path = Path(args.progress) if args.progress else layout.progress_dir
     default_store = root / "data" / "store.json"
     outdir = Path(args.outdir) if args.outdir else (
         root / "data" / "cards_by_day")
 
-    progress = _safe_read_json(progress_path) or {}
+    if args.progress:
+        progress = _safe_read_json(progress_path) or {}
+    else:
+        # per-store layout: same shape as the legacy file, for this store only
+        progress = {"settings": layout.read_settings(), "stores": {}}
     if args.store:
         sp = Path(args.store)
         if not sp.is_absolute():
@@ -398,7 +413,10 @@ def main():
         store_path = sp
     else:
         store_path = _last_store_path(progress, root) or default_store
-    store = _safe_read_json(store_path) or {}
+    if not args.progress:
+        progress["stores"][str(store_path.resolve())] = layout.read_day_log(store_path)
+    # 经存储引擎读取：只在 store.json.journal 里、尚未合并的复习也要算上
+    store = open_store(store_path).load() if store_path.exists() else {}
     mapping = _entries_by_word(store)
 
     body_font = register_body_font(args.font if args.font else None)
@@ -410,7 +428,7 @@ def main():
 
     print("—— Path Summary ——")
     print("Project root : ", root)
-    print("Progress json: ", progress_path)
+    print("Progress     : ", progress_path)
     print("Store json   : ", store_path)
     print("Output dir   : ", outdir)
     print("BODY font    : ", body_font)
@@ -420,7 +438,7 @@ def main():
     prof = _store_profile(progress, store_path)
     days_dict = (prof.get("days", {}) or {})
     if not days_dict:
-        print("⚠️ No day records found for this store in progress.json.")
+        print("⚠️ No day records found for this store.")
         return
 
     def in_window(d: str) -> bool:
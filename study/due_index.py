@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+到期索引：按 next_due_ts 排序的有序数组 + “从未复习”集合，增量维护。
+
+sample_study_items 不再全库扫描：
+- 到期卡 = 有序数组中 next_due_ts <= now 的前缀（bisect），只对这部分算 priority；
+- 新卡   = 新卡集合按原顺序取，取够即停；
+- 只有前两步凑不满 k 时才扫描其余卡（与标量版本相同的 min_days_gap 过滤）。
+
+位置 pos = 词条在 entries 中的下标；没有 word 的条目不入索引。
+返回结果（位置序列）与 sampler.sample_study_items 逐项一致：
+同 priority 时按原顺序，对应标量版本的稳定排序。
+"""
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.word_index import entry_word
+from .srs import entry_srs, now_ts, read_state, priority, SECONDS_PER_DAY
+
+
+class DueIndex:
+    def __init__(self, entries: Optional[Iterable[dict]] = None):
+        # pos -> read_state 结果（只含调度字段）
+        self._state: Dict[int, dict] = {}
+        # (next_due_ts, pos)，仅 next_due_ts != 0 的卡，升序
+        self._due: List[Tuple[float, int]] = []
+        # review_count == 0 的 pos，升序
+        self._new: List[int] = []
+        if entries is not None:
+            self.build(entries)
+
+    def build(self, entries: Iterable[dict]):
+        self._state.clear()
+        due, new = [], []
+        for i, e in enumerate(entries):
+            if not isinstance(e, dict) or not entry_word(e):
+                continue
+            s = read_state(entry_srs(e))
+            self._state[i] = s
+            if s["next_due_ts"]:
+                due.append((s["next_due_ts"], i))
+            if s["review_count"] == 0:
+                new.append(i)
+        due.sort()
+        self._due = due
+        self._new = new
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    # ---------- 增量维护 ----------
+    def _remove(self, pos: int):
+        s = self._state.pop(pos, None)
+        if s is None:
+            return
+        if s["next_due_ts"]:
+            j = bisect_left(self._due, (s["next_due_ts"], pos))
+            if j < len(self._due) and self._due[j] == (s["next_due_ts"], pos):
+                del self._due[j]
+        if s["review_count"] == 0:
+            j = bisect_left(self._new, pos)
+            if j < len(self._new) and self._new[j] == pos:
+                del self._new[j]
+
+    def update(self, pos: int, raw_srs: dict):
+        """pos 处词条的 srs 变了（复习提交后调用）；新 pos 视为新增"""
+        self._remove(pos)
+        s = read_state(raw_srs)
+        self._state[pos] = s
+        if s["next_due_ts"]:
+            insort(self._due, (s["next_due_ts"], pos))
+        if s["review_count"] == 0:
+            insort(self._new, pos)
+
+    def discard(self, pos: int):
+        self._remove(pos)
+
+    # ---------- 抽样 ----------
+    def due_count(self, now: float | None = None) -> int:
+        tnow = now or now_ts()
+        return bisect_right(self._due, (tnow, float("inf")))
+
+    def sample_study_items(self, k: int = 20, min_days_gap: float = 1.0,
+                           now: float | None = None) -> List[int]:
+        """语义同 sampler.sample_study_items，返回 entries 下标"""
+        tnow = now or now_ts()
+        if k <= 0:
+            return []
+        state = self._state
+        ndue = self.due_count(tnow)
+
+        # 1) 到期：只对到期前缀算 priority；(priority, pos) 与稳定排序等价
+        out = [pos for _, pos in heapq.nsmallest(
+            k, ((priority(state[pos], tnow), pos) for _, pos in self._due[:ndue]))]
+        if len(out) >= k:
+            return out
+
+        # 2) 新卡：按原顺序，跳过已到期的（已在第 1 步）
+        for pos in self._new:
+            s = state[pos]
+            if s["next_due_ts"] and tnow >= s["next_due_ts"]:
+                continue
+            out.append(pos)
+            if len(out) >= k:
+                return out
+
+        # 3) 其余：review_count > 0、未到期、距上次 >= min_days_gap
+        rest = []
+        for pos, s in state.items():
+            if s["review_count"] == 0 or (s["next_due_ts"] and tnow >= s["next_due_ts"]):
+                continue
+            last = s["last_ts"]
+            days_gap = (tnow - last) / SECONDS_PER_DAY if last else 999.0
+            if days_gap >= min_days_gap:
+                rest.append((priority(s, tnow), pos))
+        out.extend(pos for _, pos in heapq.nsmallest(k - len(out), rest))
+        return out
@@ -2,7 +2,7 @@
 import json
 from typing import Dict, Any, Optional
 from config import MODEL_NAME
-from api_client import setup_client
+from api_client import get_client
 
 _SYSTEM = (
     "你是严格但友好的双语词汇考官。"
@@ -62,7 +62,7 @@ def grade_with_llm(task_type: str, card: Dict[str, Any], user_answer: str,
     """
     强制工具调用；若未触发则自动重试；仍失败则尝试解析正文 JSON，最后返回兜底结果。
     """
-    client = setup_client()
+    client = get_client()
     messages = [{"role": "system", "content": _SYSTEM},
                 _build_user_msg(task_type, card, user_answer)]
 
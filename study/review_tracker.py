@@ -2,49 +2,57 @@
 """
 记录本轮学习信号，并在回合结束时统一结算分数：
 - record_signal(word, signal, note?)：回合内打点
-- compute_score(word, override?)：根据打点给出 0~1 分
+- compute_score(word, override?, events?)：根据打点（或给定的事件序列）给出 0~1 分
 - clear/snapshot：清理/查看状态
+
+状态放在有界 LRU（SignalTracker）里：只保留最近 max_words 个词，结算后即丢弃，
+长时间运行也不会无限增长。WebView 每个会话持有自己的 SignalTracker；
+模块级函数使用默认实例，接口不变。
 """
 
 from __future__ import annotations
-from collections import defaultdict
-from typing import Dict, Any, Optional
-
-_STATE: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
-    "start": "unknown",   # "forgot" | "remember" | "unknown"
-    "hint": 0,            # 提示次数
-    "zh_revealed": 0,     # 揭示中文次数
-    "correction": 0,      # 纠错次数
-    "confusion": 0,       # 混淆出现次数
-    "notes": []           # 备注堆栈
-})
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional
 
+# 每个会话最多同时跟踪的词数（一组卡片通常只有几十个）
+MAX_WORDS = 256
+# 单个词最多保留的事件数（防止异常前端刷爆内存）
+MAX_EVENTS = 64
 
-def clear(word: str) -> None:
-    _STATE.pop(word.lower(), None)
+_COUNTERS = ("hint", "zh_revealed", "correction", "confusion")
 
 
-def snapshot(word: str) -> Dict[str, Any]:
-    return dict(_STATE[word.lower()])
+def new_state() -> Dict[str, Any]:
+    return {
+        "start": "unknown",   # "forgot" | "remember" | "unknown"
+        "hint": 0,            # 提示次数
+        "zh_revealed": 0,     # 揭示中文次数
+        "correction": 0,      # 纠错次数
+        "confusion": 0,       # 混淆出现次数
+        "notes": []           # 备注堆栈
+    }
 
 
-def record_signal(word: str, signal: str, note: Optional[str] = None) -> Dict[str, Any]:
-    w = word.lower().strip()
-    s = _STATE[w]
+def apply_signal(s: Dict[str, Any], signal: str, note: Optional[str] = None) -> Dict[str, Any]:
+    """把一个信号累加到状态 s 上（原地修改并返回 s）"""
     if signal in ("start_forgot", "start_remember"):
         s["start"] = "forgot" if signal == "start_forgot" else "remember"
-    elif signal in ("hint", "zh_revealed", "correction", "confusion"):
+    elif signal in _COUNTERS:
         s[signal] = int(s.get(signal, 0) or 0) + 1
     elif signal == "note" and note:
         s["notes"].append(note.strip())
-    return snapshot(w)
+    return s
 
 
-def compute_score(word: str, override: Optional[float] = None) -> float:
-    if override is not None:
-        return max(0.0, min(1.0, float(override)))
+def replay(events: Iterable[tuple]) -> Dict[str, Any]:
+    """(signal, note) 序列 -> 状态"""
+    s = new_state()
+    for signal, note in events:
+        apply_signal(s, signal, note)
+    return s
+
 
-    s = snapshot(word)
+def score_of(s: Dict[str, Any]) -> float:
     # 基准：开场自报
     base = 0.8 if s.get("start") == "remember" else (
         0.2 if s.get("start") == "forgot" else 0.6)
@@ -57,3 +65,62 @@ def compute_score(word: str, override: Optional[float] = None) -> float:
     score -= 0.15 * int(s.get("confusion", 0))
 
     return max(0.05, min(0.95, round(score, 3)))
+
+
+class SignalTracker:
+    """词 -> 本轮事件 (signal, note) 的有界 LRU"""
+
+    def __init__(self, max_words: int = MAX_WORDS):
+        self.max_words = max_words
+        self._events: "OrderedDict[str, List[tuple]]" = OrderedDict()
+
+    @staticmethod
+    def _key(word: str) -> str:
+        return (word or "").lower().strip()
+
+    def record(self, word: str, signal: str, note: Optional[str] = None) -> List[tuple]:
+        w = self._key(word)
+        evs = self._events.pop(w, None) or []
+        if len(evs) < MAX_EVENTS:
+            evs.append((signal, note))
+        self._events[w] = evs
+        while len(self._events) > self.max_words:
+            self._events.popitem(last=False)
+        return evs
+
+    def events(self, word: str) -> Optional[List[tuple]]:
+        """本轮事件；不在 LRU 中（从未打点或已被淘汰）返回 None"""
+        return self._events.get(self._key(word))
+
+    def pop(self, word: str) -> Optional[List[tuple]]:
+        return self._events.pop(self._key(word), None)
+
+    def snapshot(self, word: str) -> Dict[str, Any]:
+        return replay(self.events(word) or ())
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+_TRACKER = SignalTracker()
+
+
+def clear(word: str) -> None:
+    _TRACKER.pop(word)
+
+
+def snapshot(word: str) -> Dict[str, Any]:
+    return _TRACKER.snapshot(word)
+
+
+def record_signal(word: str, signal: str, note: Optional[str] = None) -> Dict[str, Any]:
+    _TRACKER.record(word, signal, note)
+    return snapshot(word)
+
+
+def compute_score(word: str, override: Optional[float] = None,
+                  events: Optional[Iterable[tuple]] = None) -> float:
+    if override is not None:
+        return max(0.0, min(1.0, float(override)))
+    s = replay(events) if events is not None else snapshot(word)
+    return score_of(s)
@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
-import time
-from typing import List, Dict, Tuple
-from .srs import now_ts, ensure_state, priority
+import heapq
+import math
+import random
+from typing import Callable, List
+from .srs import now_ts, read_state, priority, SECONDS_PER_DAY, as_ts
 
 
 def _word_of(entry: dict) -> str | None:
@@ -26,57 +28,64 @@ def _normalize_item(entry: dict) -> dict:
     return {"word": w, "entry": entry}
 
 
+def _push_bounded(heap: List[tuple], k: int, neg_key, i: int, item):
+    """
+    有界堆：只保留 key 最小的 k 项（O(n log k)，不做全量排序）。
+    neg_key 为取反后的 key（堆顶即当前最“差”的一项）；同 key 时 i 小者优先，
+    与对完整列表做稳定排序再取前 k 个的结果一致。
+    """
+    node = (neg_key, -i, item)
+    if len(heap) < k:
+        heapq.heappush(heap, node)
+    elif k > 0 and node > heap[0]:
+        heapq.heapreplace(heap, node)
+
+
+def _drain(heap: List[tuple]) -> List:
+    """有界堆 -> 按 key 升序（同 key 按进入顺序）的条目列表"""
+    return [item for _, _, item in sorted(heap, reverse=True)]
+
+
 def sample_study_items(entries: List[dict], k: int = 20, min_days_gap: float = 1.0) -> List[dict]:
     """
     统一取样逻辑：
     1) 先取“到期/过期”的卡；
     2) 不足则取“从未复习过”的卡；
     3) 再不足则按统一优先级（小者优先）补齐。
+    各池只保留可能用到的前 k 个（有界堆），不做全量排序。
     """
     tnow = now_ts()
-    pool_due: List[Tuple[float, dict]] = []
+    pool_due: List[tuple] = []
     pool_new: List[dict] = []
-    pool_rest: List[Tuple[float, dict]] = []
+    pool_rest: List[tuple] = []
 
-    for e in entries:
+    for i, e in enumerate(entries):
         w = _word_of(e)
         if not w:
             continue
-        srs = ensure_state(_srs_of(e))
-        rc = int(srs.get("review_count", 0))
-        due_ts = float(srs.get("next_due_ts", 0.0))
+        srs = read_state(_srs_of(e))
+        rc = srs["review_count"]
+        due_ts = srs["next_due_ts"]
 
         if due_ts and tnow >= due_ts:
-            pool_due.append((priority(srs, tnow), e))
+            _push_bounded(pool_due, k, -priority(srs, tnow), i, e)
         elif rc == 0:
-            pool_new.append(e)
+            if len(pool_new) < k:
+                pool_new.append(e)
         else:
             # 距上次 >= min_days_gap 的卡才纳入候选（避免太快重复）
-            last_ts = float(srs.get("last_ts", 0.0))
+            last_ts = srs["last_ts"]
             days_gap = (tnow - last_ts) / 86400.0 if last_ts else 999.0
             if days_gap >= min_days_gap:
-                pool_rest.append((priority(srs, tnow), e))
-
-    pool_due.sort(key=lambda t: t[0])
-    pool_rest.sort(key=lambda t: t[0])
+                _push_bounded(pool_rest, k, -priority(srs, tnow), i, e)
 
     out: List[dict] = []
-    # 1) 到期优先
-    for pr, e in pool_due:
-        if len(out) >= k:
-            break
-        out.append(_normalize_item(e))
-    # 2) 新卡
-    for e in pool_new:
-        if len(out) >= k:
-            break
-        out.append(_normalize_item(e))
-    # 3) 其它
-    for pr, e in pool_rest:
-        if len(out) >= k:
-            break
-        out.append(_normalize_item(e))
-
+    # 1) 到期优先 2) 新卡 3) 其它
+    for pool in (_drain(pool_due), pool_new, _drain(pool_rest)):
+        for e in pool:
+            if len(out) >= k:
+                return out
+            out.append(_normalize_item(e))
     return out
 
 
@@ -84,45 +93,103 @@ def plan_daily_new(entries: List[dict], k: int = 100) -> List[dict]:
     """
     每日计划：优先选“从未复习过”的词；不够则选 review_count 最低、最近很久没碰的。
     """
-    tnow = now_ts()
     new_items = []
-    rest = []
+    rest: List[tuple] = []
 
-    for e in entries:
+    for i, e in enumerate(entries):
         w = _word_of(e)
         if not w:
             continue
-        srs = ensure_state(_srs_of(e))
-        rc = int(srs.get("review_count", 0))
+        srs = read_state(_srs_of(e))
+        rc = srs["review_count"]
         if rc == 0:
-            new_items.append(e)
-        else:
-            rest.append((rc, -(srs.get("last_ts") or 0.0), e))
-
-    out = []
-    new_items = new_items[:k]
-    out.extend([_normalize_item(e) for e in new_items])
-
-    if len(out) < k and rest:
-        rest.sort(key=lambda t: (t[0], t[1]))   # rc 小优先，last_ts 越久越优先
-        for _, __, e in rest:
-            if len(out) >= k:
-                break
-            out.append(_normalize_item(e))
+            if len(new_items) < k:
+                new_items.append(e)
+        elif len(new_items) < k:
+            # 新词已够 k 个时不再需要补充候选
+            # rc 小优先，last_ts 越久越优先（取反后入堆）
+            _push_bounded(rest, k, (-rc, srs["last_ts"]), i, e)
+
+    out = [_normalize_item(e) for e in new_items]
+    for e in _drain(rest):
+        if len(out) >= k:
+            break
+        out.append(_normalize_item(e))
     return out
 
 
 def sample_by_priority(entries: List[dict], k: int = 100) -> List[dict]:
     """
-    全库按照统一优先级（越小越紧急）排序，取前 k 个。
+    全库按照统一优先级（越小越紧急）取前 k 个（有界堆，同优先级按原顺序）。
     """
     tnow = now_ts()
-    ranked: List[Tuple[float, dict]] = []
-    for e in entries:
+    top: List[tuple] = []
+    for i, e in enumerate(entries):
         w = _word_of(e)
         if not w:
             continue
-        srs = ensure_state(_srs_of(e))
-        ranked.append((priority(srs, tnow), e))
-    ranked.sort(key=lambda t: t[0])
-    return [_normalize_item(e) for _, e in ranked[:k]]
+        _push_bounded(top, k, -priority(read_state(_srs_of(e)), tnow), i, e)
+    return [_normalize_item(e) for e in _drain(top)]
+
+
+# ---------- 加权无放回抽样（Tk 版 Chat / Study 页使用） ----------
+
+def priority_weight(srs: dict, now: float | None = None) -> float:
+    """抽样权重：priority 越小（越紧急）权重越大；范围约 0.95 ~ 20"""
+    return 1.0 / (priority(srs, now) + 0.05)
+
+
+def _last_touch(srs: dict) -> float:
+    """最近一次被安排或复习的时间"""
+    s = read_state(srs)
+    return max(s["last_ts"], as_ts(srs.get("last_scheduled_ts", 0.0)))
+
+
+def weighted_sample_without_replacement(entries: List[dict], k: int,
+                                        weight: Callable[[dict], float] | None = None,
+                                        seed: int | None = None,
+                                        now: float | None = None) -> List[dict]:
+    """
+    Efraimidis–Spirakis 加权无放回抽样：每项取 key = ln(u) / w，取 key 最大的 k 个
+    （heapq.nlargest，O(n log k)）。默认权重为 priority_weight(srs)。
+    seed 相同则结果相同。返回原 entry 对象（按抽中顺序）。
+    """
+    if k <= 0 or not entries:
+        return []
+    rnd = random.Random(seed)
+    tnow = now or now_ts()
+    wfn = weight or (lambda e: priority_weight(_srs_of(e), tnow))
+    keyed = []
+    for i, e in enumerate(entries):
+        w = wfn(e)
+        u = rnd.random()
+        if w > 0 and u > 0.0:
+            key = math.log(u) / w
+        else:
+            # 权重为 0 的项排在最后（只在正权重不够 k 个时才会被选到）
+            key = -math.inf
+        keyed.append((key, -i))
+    top = heapq.nlargest(k, keyed)
+    return [entries[-ni] for _, ni in top]
+
+
+def anti_repeat_filter(entries: List[dict], min_days_gap: float = 1.0,
+                       now: float | None = None) -> List[dict]:
+    """
+    去掉 min_days_gap 天内被安排过或复习过的词（保持原顺序）。
+    全部被滤掉时返回原列表，避免无词可学。
+    """
+    tnow = now or now_ts()
+    since = tnow - float(min_days_gap) * SECONDS_PER_DAY
+    pool = [e for e in entries if _last_touch(_srs_of(e)) < since]
+    return pool or list(entries)
+
+
+def mark_scheduled(entry: dict, now: float | None = None) -> dict:
+    """记录该词本次被安排的时间（写入 srs.last_scheduled_ts）"""
+    tnow = now or now_ts()
+    srs = entry.get("srs")
+    if not isinstance(srs, dict):
+        srs = entry["srs"] = {}
+    srs["last_scheduled_ts"] = tnow
+    return entry
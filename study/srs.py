@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 import time
 import math
-from copy import deepcopy
+import datetime
+from array import array
 from .srs_policy_14day import POLICY as P
 
 SECONDS_PER_DAY = 86400.0
@@ -18,22 +19,230 @@ def clamp(x, lo, hi):
 def ensure_state(raw: dict | None) -> dict:
     """
     统一的 SRS 状态结构。兼容老数据并补默认值。
+    （经 SRSState 规整：数值字段转为 float，history 截断到 history_cap 条）
     """
-    s = deepcopy(raw) if isinstance(raw, dict) else {}
-    s.setdefault("review_count", 0)
-    s.setdefault("ease", P["sm2_init_ease"])
-    s.setdefault("interval_days", 0.0)
-    s.setdefault("next_due_ts", 0.0)
-    s.setdefault("last_ts", 0.0)
-    # 统一的连续强度分（EMA），用于艾宾浩斯优先级
-    s.setdefault("score", 0.5)
-    # 兼容旧字段（progress_snapshot 会读取）
-    s["last_score"] = s.get("last_score", s["score"])
-    s["avg_score"] = s.get("avg_score",  s["score"])
-    # 历史
-    if not isinstance(s.get("history"), list):
-        s["history"] = []
-    return s
+    return SRSState.from_dict(raw).to_dict()
+
+
+def _as_float(x, default: float) -> float:
+    try:
+        return float(x)
+    except Exception:
+        try:
+            return float(str(x).strip())
+        except Exception:
+            return default
+
+
+def as_ts(x) -> float:
+    """时间戳字段：数字，或 update_score 写入的 ISO 字符串（UTC）"""
+    if isinstance(x, (int, float)):
+        return float(x)
+    if not x:
+        return 0.0
+    try:
+        return float(x)
+    except Exception:
+        pass
+    try:
+        dt = datetime.datetime.fromisoformat(str(x).strip().replace("Z", "+00:00"))
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=datetime.timezone.utc)
+        return dt.timestamp()
+    except Exception:
+        return 0.0
+
+
+def entry_srs(entry: dict) -> dict:
+    """词条里的 SRS 块：srs / review，或嵌套 {entry: {srs}}；没有时返回 {}"""
+    srs = entry.get("srs") or entry.get("review")
+    if not isinstance(srs, dict) and isinstance(entry.get("entry"), dict):
+        srs = entry["entry"].get("srs")
+    return srs if isinstance(srs, dict) else {}
+
+
+def read_state(raw: dict | None) -> dict:
+    """
+    只读的调度字段视图：不拷贝 history 等大字段，数值字段按需容错转换。
+    供抽样/优先级计算使用；需要写回时仍用 ensure_state + commit。
+    """
+    if not isinstance(raw, dict):
+        raw = {}
+    score = _as_float(raw.get("score", 0.5), 0.5)
+    return {
+        "review_count": int(_as_float(raw.get("review_count", 0), 0.0)),
+        "ease": _as_float(raw.get("ease", P["sm2_init_ease"]), P["sm2_init_ease"]),
+        "interval_days": _as_float(raw.get("interval_days", 0.0), 0.0),
+        "next_due_ts": as_ts(raw.get("next_due_ts", 0.0)),
+        "last_ts": as_ts(raw.get("last_ts", 0.0)),
+        "score": score,
+    }
+
+
+_STATE_KEYS = ("review_count", "ease", "interval_days", "next_due_ts", "last_ts",
+               "score", "last_score", "avg_score", "history", "history_stats")
+
+
+class SRSState:
+    """
+    紧凑的 SRS 状态：__slots__ + float 字段；history 存成打包数组
+    （ts / outcome / score），最多保留 history_cap 条，更早的记录只计入
+    滚动汇总（n / correct / sum / first_ts）。
+    from_dict / to_dict 与原先的 dict 结构互转，未知字段原样保留。
+    """
+
+    __slots__ = ("review_count", "ease", "interval_days", "next_due_ts", "last_ts",
+                 "score", "last_score", "avg_score",
+                 "h_ts", "h_outcome", "h_score",
+                 "n_reviews", "n_correct", "sum_outcome", "first_ts", "extra")
+
+    def __init__(self):
+        self.review_count = 0
+        self.ease = float(P["sm2_init_ease"])
+        self.interval_days = 0.0
+        self.next_due_ts = 0.0
+        self.last_ts = 0.0
+        self.score = 0.5
+        self.last_score = 0.5
+        self.avg_score = 0.5
+        self.h_ts = array("d")
+        self.h_outcome = array("d")
+        self.h_score = array("d")
+        self.n_reviews = 0
+        self.n_correct = 0
+        self.sum_outcome = 0.0
+        self.first_ts = 0.0
+        self.extra: dict = {}
+
+    @classmethod
+    def from_dict(cls, raw: dict | None) -> "SRSState":
+        s = cls()
+        if not isinstance(raw, dict):
+            return s
+        s.review_count = int(_as_float(raw.get("review_count", 0), 0.0))
+        s.ease = _as_float(raw.get("ease", P["sm2_init_ease"]), P["sm2_init_ease"])
+        s.interval_days = _as_float(raw.get("interval_days", 0.0), 0.0)
+        s.next_due_ts = as_ts(raw.get("next_due_ts", 0.0))
+        s.last_ts = as_ts(raw.get("last_ts", 0.0))
+        s.score = _as_float(raw.get("score", 0.5), 0.5)
+        s.last_score = _as_float(raw.get("last_score", s.score), s.score)
+        s.avg_score = _as_float(raw.get("avg_score", s.score), s.score)
+
+        hist = raw.get("history")
+        events = [h for h in hist if isinstance(h, dict)] if isinstance(hist, list) else []
+        summary = raw.get("history_stats")
+        if isinstance(summary, dict):
+            s.n_reviews = int(_as_float(summary.get("n", 0), 0.0))
+            s.n_correct = int(_as_float(summary.get("correct", 0), 0.0))
+            s.sum_outcome = _as_float(summary.get("sum", 0.0), 0.0)
+            s.first_ts = as_ts(summary.get("first_ts", 0.0))
+        else:
+            # 老数据：由完整 history 得出汇总
+            for h in events:
+                s._count(as_ts(h.get("ts", 0.0)), _as_float(h.get("outcome", 0.0), 0.0))
+        for h in events[-_history_cap():]:
+            s.h_ts.append(as_ts(h.get("ts", 0.0)))
+            s.h_outcome.append(_as_float(h.get("outcome", 0.0), 0.0))
+            s.h_score.append(_as_float(h.get("score", s.score), s.score))
+
+        s.extra = {k: v for k, v in raw.items() if k not in _STATE_KEYS}
+        return s
+
+    def to_dict(self) -> dict:
+        d = dict(self.extra)
+        d["review_count"] = self.review_count
+        d["ease"] = self.ease
+        d["interval_days"] = self.interval_days
+        d["next_due_ts"] = self.next_due_ts
+        d["last_ts"] = self.last_ts
+        d["score"] = self.score
+        d["last_score"] = self.last_score
+        d["avg_score"] = self.avg_score
+        d["history"] = [{"ts": t, "outcome": o, "score": sc}
+                        for t, o, sc in zip(self.h_ts, self.h_outcome, self.h_score)]
+        d["history_stats"] = {"n": self.n_reviews, "correct": self.n_correct,
+                              "sum": self.sum_outcome, "first_ts": self.first_ts}
+        return d
+
+    def _count(self, ts: float, outcome: float):
+        if self.n_reviews == 0:
+            self.first_ts = ts
+        self.n_reviews += 1
+        self.n_correct += outcome >= 0.5
+        self.sum_outcome += outcome
+
+    def record(self, ts: float, outcome: float, score: float):
+        """追加一条复习记录；超过 history_cap 时丢弃最早的（汇总仍计入）"""
+        self._count(ts, outcome)
+        self.h_ts.append(ts)
+        self.h_outcome.append(outcome)
+        self.h_score.append(score)
+        extra = len(self.h_ts) - _history_cap()
+        if extra > 0:
+            del self.h_ts[:extra]
+            del self.h_outcome[:extra]
+            del self.h_score[:extra]
+
+    def commit(self, outcome: float, now: float | None = None):
+        """一次复习（规则见模块函数 commit）"""
+        tnow = now or now_ts()
+        outcome = float(outcome)
+
+        # 1) EMA 强度分
+        alpha = P["ema_alpha"]
+        new_score = (1.0 - alpha) * self.score + alpha * outcome
+        self.score = clamp(new_score, 0.0, 1.0)
+        self.last_score = outcome
+        self.avg_score = self.score
+
+        # 2) 记录历史
+        self.record(tnow, outcome, self.score)
+        self.last_ts = tnow
+
+        # 3) SM-2 风格更新
+        ease = self.ease
+        rc = self.review_count
+        interval = self.interval_days
+
+        if outcome < 0.5:
+            # 错误：降低 ease（表现越差影响越大），并重置为较短间隔
+            ease = clamp(
+                ease - (P["delta_ease_wrong"] + (1.0 - self.score) * 0.4),
+                P["sm2_min_ease"], P["sm2_max_ease"]
+            )
+            # 错误后一律回到较短间隔（给跨天排期；组内即时强化由前端“弱循环”负责）
+            if rc <= 1:
+                interval = P["first_interval_days"]
+            else:
+                interval = max(1.0, interval * 0.5)
+        else:
+            # 正确：略升 ease（高分更容易升）
+            ease = clamp(
+                ease + (P["delta_ease_right"] + self.score * 0.1),
+                P["sm2_min_ease"], P["sm2_max_ease"]
+            )
+            # 过期奖励：如果这次复习已晚于安排，下次间隔略放大
+            overdue_mul = 1.0
+            if self.next_due_ts and tnow > self.next_due_ts:
+                overdue_mul = P["overdue_factor"]
+
+            if rc == 0:
+                interval = P["first_interval_days"]
+            elif rc == 1:
+                interval = P["second_interval_days"]
+            else:
+                # SM-2 递推：下次间隔 = 上次间隔 * 等效 ease
+                interval = max(1.0, interval * _effective_ease(ease, self.score))
+            interval *= overdue_mul
+
+        self.ease = ease
+        self.interval_days = float(interval)
+        self.review_count = rc + 1
+        self.next_due_ts = tnow + interval * SECONDS_PER_DAY
+
+
+def _history_cap() -> int:
+    return max(1, int(P.get("history_cap", 32)))
 
 
 def _effective_ease(ease: float, score: float) -> float:
@@ -51,69 +260,14 @@ def commit(state_in: dict, outcome: float, now: float | None = None) -> dict:
     - 更新 EMA 强度分、last_ts、history
     - 更新 SM-2 的 ease / interval_days / next_due_ts
     """
-    tnow = now or now_ts()
-    s = ensure_state(state_in)
-
-    # 1) EMA 强度分
-    alpha = P["ema_alpha"]
-    old_score = float(s.get("score", 0.5))
-    new_score = (1.0 - alpha) * old_score + alpha * float(outcome)
-    s["score"] = clamp(new_score, 0.0, 1.0)
-    s["last_score"] = float(outcome)
-    s["avg_score"] = s["score"]
-
-    # 2) 记录历史
-    s["history"].append(
-        {"ts": tnow, "outcome": float(outcome), "score": s["score"]})
-    s["last_ts"] = tnow
-
-    # 3) SM-2 风格更新
-    ease = float(s.get("ease", P["sm2_init_ease"]))
-    rc = int(s.get("review_count", 0))
-    interval = float(s.get("interval_days", 0.0))
-
-    if outcome < 0.5:
-        # 错误：降低 ease（表现越差影响越大），并重置为较短间隔
-        ease = clamp(
-            ease - (P["delta_ease_wrong"] + (1.0 - s["score"]) * 0.4),
-            P["sm2_min_ease"], P["sm2_max_ease"]
-        )
-        # 错误后一律回到较短间隔（给跨天排期；组内即时强化由前端“弱循环”负责）
-        if rc <= 1:
-            interval = P["first_interval_days"]
-        else:
-            interval = max(1.0, interval * 0.5)
-    else:
-        # 正确：略升 ease（高分更容易升）
-        ease = clamp(
-            ease + (P["delta_ease_right"] + s["score"] * 0.1),
-            P["sm2_min_ease"], P["sm2_max_ease"]
-        )
-        # 过期奖励：如果这次复习已晚于安排，下次间隔略放大
-        overdue_mul = 1.0
-        if s.get("next_due_ts", 0.0) and tnow > float(s["next_due_ts"]):
-            overdue_mul = P["overdue_factor"]
-
-        if rc == 0:
-            interval = P["first_interval_days"]
-        elif rc == 1:
-            interval = P["second_interval_days"]
-        else:
-            # SM-2 递推：下次间隔 = 上次间隔 * 等效 ease
-            interval = max(1.0, interval * _effective_ease(ease, s["score"]))
-        interval *= overdue_mul
-
-    s["ease"] = ease
-    s["interval_days"] = float(interval)
-    s["review_count"] = rc + 1
-    s["next_due_ts"] = tnow + interval * SECONDS_PER_DAY
-
-    return s
+    s = SRSState.from_dict(state_in)
+    s.commit(outcome, now)
+    return s.to_dict()
 
 
 def days_since_last(state: dict, now: float | None = None) -> float:
     tnow = now or now_ts()
-    last = float(ensure_state(state).get("last_ts", 0.0))
+    last = read_state(state)["last_ts"]
     if not last:
         return 999.0
     return max(0.0, (tnow - last) / SECONDS_PER_DAY)
@@ -124,10 +278,11 @@ def retention(state: dict, now: float | None = None) -> float:
     艾宾浩斯保留率 R(t) = exp( - t / (tau * strength) )
     strength ≈ score（0.05~1.0）。返回值越小 → 越容易忘 → 越紧急。
     """
-    s = ensure_state(state)
+    s = read_state(state)
     tnow = now or now_ts()
-    tdays = days_since_last(s, tnow)
-    strength = clamp(s.get("score", 0.5), 0.05, 1.0)
+    last = s["last_ts"]
+    tdays = max(0.0, (tnow - last) / SECONDS_PER_DAY) if last else 999.0
+    strength = clamp(s["score"], 0.05, 1.0)
     tau = float(P["tau_days"])
     return math.exp(- tdays / (tau * strength))
 
@@ -137,9 +292,37 @@ def priority(state: dict, now: float | None = None) -> float:
     统一优先级：先看“是否到期/过期”，再看艾宾浩斯保留率。
     返回值越小越优先。
     """
-    s = ensure_state(state)
+    s = read_state(state)
     tnow = now or now_ts()
-    due = float(s.get("next_due_ts", 0.0))
+    due = s["next_due_ts"]
     # 过期/到期的卡片优先因子（更小）
     due_factor = 0.2 if (due and tnow >= due) else 1.0
     return due_factor * retention(s, tnow)
+
+
+# ---------- 旧接口（Tk 版 gui/app.py、gui/modern_app.py 使用） ----------
+
+DEFAULT_SRS = {
+    "review_count": 0,
+    "ease": P["sm2_init_ease"],
+    "interval_days": 0.0,
+    "next_due_ts": 0.0,
+    "last_ts": 0.0,
+    "score": 0.5,
+}
+
+
+def ensure(raw: dict | None) -> dict:
+    return ensure_state(raw)
+
+
+def update(state: dict, score_0_1: float, now: float | None = None) -> dict:
+    """按 0~1 评分提交一次复习；额外写入 ISO 格式的 next_due（UTC）供旧界面显示"""
+    s = commit(state, outcome=clamp(float(score_0_1), 0.0, 1.0), now=now)
+    s["next_due"] = datetime.datetime.fromtimestamp(
+        s["next_due_ts"], tz=datetime.timezone.utc).isoformat()
+    return s
+
+
+def score_priority(state: dict, now: float | None = None) -> float:
+    return priority(state, now)
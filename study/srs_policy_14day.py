@@ -23,5 +23,8 @@ POLICY = {
     "second_interval_days": 6.0,
 
     # 过期复习的奖励（把实际间隔乘以 overdue_factor）
-    "overdue_factor": 1.15
+    "overdue_factor": 1.15,
+
+    # 每张卡保留的最近复习记录条数（更早的只计入 history_stats 汇总）
+    "history_cap": 32
 }
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+列式 SRS 表：把词库的调度字段存成 NumPy 数组，向量化计算 retention / priority，
+并提供三个抽样函数的批量版本（返回行号）。
+
+- 行 = 传入的 entries 中“有 word 的条目”，顺序不变；
+- 数值读取与 srs.read_state 完全一致；
+- 向量化结果与标量可能差几个 ulp（np.exp vs math.exp 等），所以批量抽样先用向量化结果选出候选，
+  再在边界附近用标量 srs.priority 重新精确排序（稳定、按原顺序打破平局），
+  返回结果与 sampler.py 中的标量版本逐项一致。
+
+NumPy 为可选依赖：未安装时 available() 为 False，调用方退回标量版本。
+"""
+from typing import Iterable, List
+
+try:
+    import numpy as np
+except Exception:  # noqa
+    np = None
+
+from utils.word_index import entry_word
+from .srs import entry_srs, now_ts, read_state, priority, SECONDS_PER_DAY
+from .srs_policy_14day import POLICY as P
+
+# 候选阈值的相对容差：远大于 exp 的误差（~1e-15），又足够小不会引入多余候选
+_REL_TOL = 1e-9
+
+
+def available() -> bool:
+    return np is not None
+
+
+class SRSTable:
+    COLUMNS = ("next_due_ts", "last_ts", "score", "review_count", "ease", "interval_days")
+
+    def __init__(self, n: int):
+        if np is None:
+            raise RuntimeError("SRSTable needs numpy (pip install numpy)")
+        self.n = n
+        self.next_due_ts = np.zeros(n, dtype=np.float64)
+        self.last_ts = np.zeros(n, dtype=np.float64)
+        self.score = np.full(n, 0.5, dtype=np.float64)
+        self.review_count = np.zeros(n, dtype=np.int64)
+        self.ease = np.full(n, float(P["sm2_init_ease"]), dtype=np.float64)
+        self.interval_days = np.zeros(n, dtype=np.float64)
+        # 行 -> 原 entries 下标
+        self.pos = np.zeros(n, dtype=np.int64)
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[dict]) -> "SRSTable":
+        rows = []
+        for i, e in enumerate(entries):
+            if isinstance(e, dict) and entry_word(e):
+                rows.append((i, read_state(entry_srs(e))))
+        t = cls(len(rows))
+        for r, (i, s) in enumerate(rows):
+            t.pos[r] = i
+            t._set(r, s)
+        return t
+
+    def _set(self, row: int, s: dict):
+        self.next_due_ts[row] = s["next_due_ts"]
+        self.last_ts[row] = s["last_ts"]
+        self.score[row] = s["score"]
+        self.review_count[row] = s["review_count"]
+        self.ease[row] = s["ease"]
+        self.interval_days[row] = s["interval_days"]
+
+    def row_of(self, pos: int) -> int:
+        """entries 下标 -> 行号；该条目不在表中返回 -1"""
+        r = int(np.searchsorted(self.pos, pos))
+        return r if r < self.n and self.pos[r] == pos else -1
+
+    def update(self, row: int, raw_srs: dict):
+        """某行复习后增量更新"""
+        self._set(row, read_state(raw_srs))
+
+    def state(self, row: int) -> dict:
+        return {c: (int(getattr(self, c)[row]) if c == "review_count" else float(getattr(self, c)[row]))
+                for c in self.COLUMNS}
+
+    # ---------- 向量化 ----------
+    def _due_mask(self, tnow: float):
+        return (self.next_due_ts != 0.0) & (tnow >= self.next_due_ts)
+
+    def retention(self, now: float | None = None, rows=None):
+        """逐元素对应 srs.retention（np.exp 与 math.exp 可能差 1~2 ulp）"""
+        tnow = now or now_ts()
+        last = self.last_ts if rows is None else self.last_ts[rows]
+        score = self.score if rows is None else self.score[rows]
+        tdays = np.subtract(tnow, last)
+        tdays /= SECONDS_PER_DAY
+        np.maximum(tdays, 0.0, out=tdays)
+        np.copyto(tdays, 999.0, where=(last == 0.0))
+        denom = np.clip(score, 0.05, 1.0)
+        denom *= float(P["tau_days"])
+        tdays /= denom
+        np.negative(tdays, out=tdays)
+        return np.exp(tdays, out=tdays)
+
+    def priority(self, now: float | None = None, rows=None):
+        """
+        逐元素对应 srs.priority（到期卡 0.2 * retention，否则 retention），
+        误差在几个 ulp 内；需要精确值时用 exact_priority。
+        """
+        tnow = now or now_ts()
+        due = self.next_due_ts if rows is None else self.next_due_ts[rows]
+        out = self.retention(tnow, rows)
+        # 1 - 0.8*mask 比 np.where(mask, 0.2, 1.0) 快得多（无分支）
+        factor = ((due != 0.0) & (tnow >= due)).astype(np.float64)
+        factor *= -0.8
+        factor += 1.0
+        out *= factor
+        return out
+
+    def exact_priority(self, row: int, now: float) -> float:
+        return priority({"next_due_ts": float(self.next_due_ts[row]),
+                         "last_ts": float(self.last_ts[row]),
+                         "score": float(self.score[row])}, now)
+
+
+# ---------- 选择工具 ----------
+
+def _by_priority(table: SRSTable, rows, k: int, tnow: float) -> List[int]:
+    """
+    rows（升序行号；None 表示全部）中 priority 最小的 k 个，
+    结果与标量版本的稳定排序一致
+    """
+    n = table.n if rows is None else len(rows)
+    if k <= 0 or n == 0:
+        return []
+    if rows is None:
+        rows = np.arange(n)
+    if k < n:
+        approx = table.priority(tnow, rows)
+        thr = np.partition(approx, k - 1)[k - 1]
+        rows = rows[approx <= thr + abs(thr) * _REL_TOL + 1e-300]
+    # 精确值只依赖 (last_ts, score, 是否到期)：相同输入只算一次标量 priority，
+    # 大量并列（如从未复习的新词）时也不会退化成逐行 Python 循环
+    due = table.next_due_ts[rows]
+    keys = np.stack([table.last_ts[rows], table.score[rows],
+                     (due != 0.0) & (tnow >= due)], axis=1)
+    _, first, inv = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    exact = np.array([table.exact_priority(int(rows[i]), tnow) for i in first])[inv.ravel()]
+    order = np.lexsort((rows, exact))[:k]
+    return [int(r) for r in rows[order]]
+
+
+def _smallest_stable(vals, k: int):
+    """vals 中最小的 k 个的下标（稳定：相等时按下标）"""
+    n = len(vals)
+    if k <= 0 or n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(vals, kind="stable")
+    thr = np.partition(vals, k - 1)[k - 1]
+    cand = np.flatnonzero(vals <= thr)
+    return cand[np.argsort(vals[cand], kind="stable")][:k]
+
+
+# ---------- 批量抽样（返回行号；语义同 sampler.py） ----------
+
+def sample_study_items_batch(table: SRSTable, k: int = 20, min_days_gap: float = 1.0,
+                             now: float | None = None) -> List[int]:
+    tnow = now or now_ts()
+    due = table._due_mask(tnow)
+    out = _by_priority(table, np.flatnonzero(due), k, tnow)
+    if len(out) < k:
+        new_rows = np.flatnonzero(~due & (table.review_count == 0))
+        out.extend(int(r) for r in new_rows[:k - len(out)])
+    if len(out) < k:
+        last = table.last_ts
+        gap = np.where(last != 0.0, (tnow - last) / SECONDS_PER_DAY, 999.0)
+        rest = np.flatnonzero(~due & (table.review_count != 0) & (gap >= min_days_gap))
+        out.extend(_by_priority(table, rest, k - len(out), tnow))
+    return out
+
+
+def plan_daily_new_batch(table: SRSTable, k: int = 100) -> List[int]:
+    rc = table.review_count
+    out = [int(r) for r in np.flatnonzero(rc == 0)[:max(0, k)]]
+    need = k - len(out)
+    if need <= 0:
+        return out
+    rest = np.flatnonzero(rc != 0)
+    if len(rest) == 0:
+        return out
+    # 按 (review_count 升序, last_ts 降序) 稳定排序取前 need 个
+    rrc = rc[rest]
+    if need < len(rest):
+        thr = np.partition(rrc, need - 1)[need - 1]
+        below = rest[rrc < thr]
+        eq = rest[rrc == thr]
+        picked = eq[_smallest_stable(-table.last_ts[eq], need - len(below))]
+        rest = np.sort(np.concatenate([below, picked]))
+    order = np.lexsort((-table.last_ts[rest], rc[rest]))
+    out.extend(int(r) for r in rest[order][:need])
+    return out
+
+
+def sample_by_priority_batch(table: SRSTable, k: int = 100, now: float | None = None) -> List[int]:
+    tnow = now or now_ts()
+    return _by_priority(table, None, k, tnow)
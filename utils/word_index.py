@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+词条查找索引：word -> 词条在 entries 中的位置，O(1) 查询。
+
+查询顺序（与原先各处的线性扫描一致）：
+  1) 原词精确匹配
+  2) casefold 后匹配
+  3) 查询词做复数归一（ies->y, es, s）后再按 casefold 匹配
+不反向归一词库里的词：否则查 "new" 会命中 "news"，upsert_word("new") 就改错词条。
+同一个 key 命中多条时取最靠前的一条（与线性扫描返回第一条一致）。
+写入路径（更新 SRS 等）只能用 exact()：模糊匹配会把 "news" 的复习记到 "new" 上。
+"""
+from typing import Callable, Dict, Iterable, Optional
+
+
+def normalize_query_word(w: str) -> str:
+    if not w:
+        return w
+    wl = w.strip().lower()
+    if len(wl) > 3 and wl.endswith("ies"):
+        return wl[:-3] + "y"
+    if len(wl) > 2 and wl.endswith("es"):
+        return wl[:-2]
+    if len(wl) > 2 and wl.endswith("s"):
+        return wl[:-1]
+    return wl
+
+
+def entry_word(e) -> Optional[str]:
+    """兼容 {word,...} 与 {entry:{word,...}} 两种结构"""
+    if not isinstance(e, dict):
+        return None
+    if e.get("word"):
+        return e["word"]
+    if isinstance(e.get("entry"), dict):
+        return e["entry"].get("word")
+    return None
+
+
+class WordIndex:
+    def __init__(self, entries: Optional[Iterable] = None,
+                 word_of: Callable[[dict], Optional[str]] = entry_word):
+        self._word_of = word_of
+        self._exact: Dict[str, int] = {}
+        self._fold: Dict[str, int] = {}
+        if entries is not None:
+            self.build(entries)
+
+    def build(self, entries: Iterable):
+        self._exact.clear()
+        self._fold.clear()
+        for i, e in enumerate(entries):
+            w = self._word_of(e)
+            if w:
+                self._put(i, w, replace=False)
+
+    def _put(self, pos: int, w: str, replace: bool):
+        for m, k in ((self._exact, w), (self._fold, w.casefold())):
+            if replace or k not in m:
+                m[k] = pos
+
+    def add(self, pos: int, word: str):
+        """新增词条（append 之后调用）；已有同名 key 时保留更靠前的位置"""
+        if word:
+            self._put(pos, word, replace=False)
+
+    def upsert(self, pos: int, old_word: Optional[str], new_word: str):
+        """词条在 pos 处改名/写入：去掉旧 key，再登记新 key"""
+        if old_word and old_word != new_word:
+            for m, k in ((self._exact, old_word), (self._fold, old_word.casefold())):
+                if m.get(k) == pos:
+                    m.pop(k, None)
+        self.add(pos, new_word)
+
+    def exact(self, word: str) -> int:
+        """仅原词精确匹配；找不到返回 -1"""
+        if not word:
+            return -1
+        i = self._exact.get(word)
+        return -1 if i is None else i
+
+    def lookup(self, word: str) -> int:
+        """返回位置；找不到返回 -1"""
+        if not word:
+            return -1
+        i = self._exact.get(word)
+        if i is not None:
+            return i
+        wf = word.strip().casefold()
+        i = self._fold.get(wf)
+        if i is not None:
+            return i
+        base = normalize_query_word(word).casefold()
+        if base == wf:
+            return -1
+        i = self._fold.get(base)
+        return -1 if i is None else i
+
+    def __contains__(self, word: str) -> bool:
+        return self.lookup(word) != -1
+
+    def __len__(self) -> int:
+        return len(self._exact)
@@ -261,12 +261,7 @@
       await this._ensureCardData(this.current);
       this._prefetchNext(3);
 
-      await callApi(
-        "record_signal_tool",
-        this.current.word,
-        "view_start",
-        `${this.mode}:${this.stage}`
-      );
+      trackSignal(this.current.word, "view_start", `${this.mode}:${this.stage}`);
       saveSession();
     },
 
@@ -293,8 +288,7 @@
 
       this.needVerify = !!remembered;
       const w = this.current;
-      await callApi(
-        "record_signal_tool",
+      trackSignal(
         w.word,
         remembered ? "start_remember" : "start_forgot",
         `${this.mode}:${this.stage}`
@@ -333,24 +327,14 @@
       setButtonsEnabled("next-actions", false);
 
       const w = this.current;
-      await callApi(
-        "record_signal_tool",
-        w.word,
-        "verify",
-        ok ? "verified_correct" : "verified_wrong"
-      );
       this.seenStates[this.activeIndex] = ok ? "ok" : "weak";
       if (ok && this.stage === "weakloop") this.weakSet.delete(w.word);
       if (!ok) this.weakSet.add(w.word);
 
-      // 关键修复：记录“今天学过该词”
-      await callApi("note_learn_event", w.word);
-
-      // 同步 SRS 与平均分：正确=1.0，错误=0.0
-      await callApi("commit_review", w.word, ok ? 1.0 : 0.0);
-      await callApi("update_score", w.word, ok ? 1.0 : 0.0);
-
-      await refreshStats();
+      // 一次调用完成：信号 + 记录“今天学过该词” + SRS/平均分（正确=1.0，错误=0.0）+ 统计
+      await finalizeCard(w.word, ok ? 1.0 : 0.0, [
+        { signal: "verify", note: ok ? "verified_correct" : "verified_wrong" },
+      ]);
       this._updateProgress();
       await this._next();
       this.backBusy = false;
@@ -365,17 +349,13 @@
       setButtonsEnabled("next-actions", false);
 
       const w = this.current;
-      await callApi("record_signal_tool", w.word, "verify", "verified_wrong");
       this.seenStates[this.activeIndex] = "weak";
       this.weakSet.add(w.word);
 
       // 同样记录“今天学过该词”（幂等）
-      await callApi("note_learn_event", w.word);
-
-      await callApi("commit_review", w.word, 0.0);
-      await callApi("update_score", w.word, 0.0);
-
-      await refreshStats();
+      await finalizeCard(w.word, 0.0, [
+        { signal: "verify", note: "verified_wrong" },
+      ]);
       this._updateProgress();
       await this._next();
       this.backBusy = false;
@@ -428,21 +408,72 @@
   };
 
   // ---- persistence ----
+  // Sessions are saved as word keys + cursor (v2). A full snapshot is sent only
+  // when masterWords/activeWords change; otherwise just the changed cursor
+  // fields go through patch_session_state.
+  const SESSION_PATCH_KEYS = [
+    "mode",
+    "groupSize",
+    "groupStart",
+    "stage",
+    "activeIndex",
+    "seenStates",
+    "weakSet",
+  ];
+  let savedLists = null; // [masterWords, activeWords] of the last full save
+  let savedFields = {}; // JSON of each cursor field as last sent
+
+  function sessionFields() {
+    return {
+      mode: fc.mode,
+      groupSize: fc.groupSize,
+      groupStart: fc.groupStart,
+      stage: fc.stage,
+      activeIndex: fc.activeIndex,
+      seenStates: fc.seenStates.slice(),
+      weakSet: Array.from(fc.weakSet),
+    };
+  }
+
+  function markSaved(fields) {
+    savedLists = [fc.masterWords, fc.activeWords];
+    savedFields = {};
+    for (const k of SESSION_PATCH_KEYS)
+      savedFields[k] = JSON.stringify(fields[k]);
+  }
+
   async function saveSession(clear = false) {
-    const st = clear
-      ? null
-      : {
-          mode: fc.mode,
-          masterWords: fc.masterWords,
-          groupSize: fc.groupSize,
-          groupStart: fc.groupStart,
-          stage: fc.stage,
-          activeWords: fc.activeWords,
-          activeIndex: fc.activeIndex,
-          seenStates: fc.seenStates,
-          weakSet: Array.from(fc.weakSet),
-        };
-    await callApi("save_session_state", st);
+    if (clear) {
+      savedLists = null;
+      savedFields = {};
+      await callApi("save_session_state", null);
+      return;
+    }
+    const f = sessionFields();
+    if (
+      savedLists &&
+      savedLists[0] === fc.masterWords &&
+      savedLists[1] === fc.activeWords
+    ) {
+      const patch = {};
+      for (const k of SESSION_PATCH_KEYS) {
+        const j = JSON.stringify(f[k]);
+        if (j !== savedFields[k]) {
+          patch[k] = f[k];
+          savedFields[k] = j;
+        }
+      }
+      if (!Object.keys(patch).length) return;
+      const r = await callApi("patch_session_state", patch);
+      if (r?.ok) return;
+    }
+    markSaved(f);
+    await callApi("save_session_state", {
+      v: 2,
+      words: fc.masterWords.map((x) => x.word),
+      active: fc.activeWords.map((x) => x.word),
+      ...f,
+    });
   }
 
   async function tryResume() {
@@ -458,6 +489,7 @@
     fc.activeIndex = st.activeIndex || 0;
     fc.seenStates = st.seenStates || [];
     fc.weakSet = new Set(st.weakSet || []);
+    markSaved(sessionFields());
     if (fc.activeWords.length) {
       const banner = document.getElementById("session-banner");
       banner.classList.remove("hidden");
@@ -520,6 +552,47 @@
     renderDonut(snap);
   }
 
+  // ---- learning signals ----
+  // Buffered and sent in batches through record_signals; finalize_card carries
+  // whatever is still pending, so signals cost no round trip of their own.
+  const SIGNAL_FLUSH_MS = 2000;
+  const SIGNAL_BATCH_MAX = 32;
+  let signalBuffer = [];
+  let signalTimer = null;
+
+  function trackSignal(word, signal, note = "") {
+    signalBuffer.push({ word, signal, note, ts: Date.now() / 1000 });
+    if (signalBuffer.length >= SIGNAL_BATCH_MAX) flushSignals();
+    else if (!signalTimer)
+      signalTimer = setTimeout(flushSignals, SIGNAL_FLUSH_MS);
+  }
+
+  function takeSignals() {
+    if (signalTimer) clearTimeout(signalTimer);
+    signalTimer = null;
+    const batch = signalBuffer;
+    signalBuffer = [];
+    return batch;
+  }
+
+  async function flushSignals() {
+    const batch = takeSignals();
+    if (batch.length) await callApi("record_signals", batch);
+  }
+
+  window.addEventListener("pagehide", () => flushSignals());
+
+  // 一张卡结束：单次桥接调用（附带未发送的信号），返回新的 SRS 与统计
+  async function finalizeCard(word, outcome, signals) {
+    const pending = takeSignals().concat(
+      (signals || []).map((s) => ({ word, ts: Date.now() / 1000, ...s }))
+    );
+    const r = await callApi("finalize_card", word, outcome, pending);
+    if (r?.ok && r.snapshot) renderDonut(r.snapshot);
+    else if (r && !r.ok && r.error) addBubble("⚠️ " + r.error, false);
+    return r;
+  }
+
   // ---- hooks ----
   document
     .getElementById("btn-start-daily")